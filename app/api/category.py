@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, status, Request, HTTPException
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status, Request, HTTPException, Header, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # custom imports
@@ -9,7 +12,10 @@ from app.schemas.category import (
     CategoryResponse,
 )
 from app.models.category import Category
-from app.services.category import update_category_data
+from app.services.category import update_category_data, get_cached_category, invalidate_category_cache
+from app.services.posts import stream_category_posts
+from app.utils.etag import etag_matches
+from app.utils.streaming import NDJSON_MEDIA_TYPE
 
 
 router = APIRouter(prefix="/v1/category")
@@ -20,7 +26,7 @@ logger = Logger()
 async def create_category(payload: CategorySchema, request: Request, db_session: AsyncSession = Depends(get_db)):
     req_id = request.state.request_id
     jwt_payload = request.state.jwt_payload
-    _id = jwt_payload.get("id")
+    _id = jwt_payload.id
     if not _id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Unauthorized user")
 
@@ -30,19 +36,58 @@ async def create_category(payload: CategorySchema, request: Request, db_session:
 
     # save category
     await _category.save(db_session)
+    await invalidate_category_cache(request.app.state.redis, _category.id)
     logger.log_debug(f"Request ID: {req_id} | JWT Payload: {jwt_payload} | Category created: {payload.name}")
     return _category
 
 
 @router.patch("/{category_id}", status_code=status.HTTP_200_OK, response_model=CategoryResponse)
-async def update_category(category_id: int, payload: CategorySchema, request: Request, db_session: AsyncSession = Depends(get_db)):
+async def update_category(
+    category_id: int,
+    payload: CategorySchema,
+    request: Request,
+    if_match: Annotated[str | None, Header()] = None,
+    db_session: AsyncSession = Depends(get_db),
+):
     req_id = request.state.request_id
     jwt_payload = request.state.jwt_payload
-    _id = jwt_payload.get("id")
+    _id = jwt_payload.id
     if not _id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Unauthorized user")
 
     # find and update the category data
-    _category = await update_category_data(db_session, category_id, payload, _id)
+    _category = await update_category_data(db_session, category_id, payload, _id, if_match=if_match)
+    await invalidate_category_cache(request.app.state.redis, category_id)
     logger.log_debug(f"Request ID: {req_id} | JWT Payload: {jwt_payload} | Category updated: {category_id}")
     return _category
+
+
+@router.get("/{category_id}", status_code=status.HTTP_200_OK, response_model=CategoryResponse)
+async def get_category(
+    category_id: int,
+    request: Request,
+    if_none_match: Annotated[str | None, Header()] = None,
+    db_session: AsyncSession = Depends(get_db),
+):
+    req_id = request.state.request_id
+    # the post count is a maintained counter, no need to count the posts here
+    _category = await get_cached_category(db_session, category_id)
+    if not _category:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+
+    if etag_matches(if_none_match, _category.etag):
+        logger.log_debug(f"Request ID: {req_id} | Category not modified: {category_id}")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": _category.etag})
+    logger.log_debug(f"Request ID: {req_id} | Category retrieved: {category_id}")
+    return Response(content=_category.payload, media_type="application/json", headers={"ETag": _category.etag})
+
+
+@router.get("/{category_id}/posts/export", status_code=status.HTTP_200_OK)
+async def export_category_posts(category_id: int, request: Request, db_session: AsyncSession = Depends(get_db)):
+    req_id = request.state.request_id
+    _category = await get_cached_category(db_session, category_id)
+    if not _category:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+
+    logger.log_info(f"Request ID: {req_id} | Exporting posts of category: {category_id}")
+    return StreamingResponse(stream_category_posts(category_id), media_type=NDJSON_MEDIA_TYPE)
@@ -2,6 +2,11 @@ import logging
 
 from fastapi import APIRouter, status, Request
 
+# custom imports
+from app.services.passwords import password_hasher
+from app.services.views import flush_stats, get_pending_views
+from app.utils.cache import get_cache_stats
+
 router = APIRouter()
 
 
@@ -14,3 +19,24 @@ async def redis_check(request: Request):
     except Exception as e:
         logging.error(f"Redis error: {e}")
     return _info
+
+
+@router.get("/cache", status_code=status.HTTP_200_OK)
+async def cache_check():
+    # hit/miss counters of the caches of this worker
+    return get_cache_stats()
+
+
+@router.get("/views", status_code=status.HTTP_200_OK)
+async def views_check(request: Request):
+    # backlog of the buffered view counts and the last flushes of this worker
+    return {
+        "pending_posts": await get_pending_views(request.app.state.redis),
+        **flush_stats.as_dict(),
+    }
+
+
+@router.get("/passwords", status_code=status.HTTP_200_OK)
+async def passwords_check():
+    # queue depth and rejections of the password hashing pool of this worker
+    return password_hasher.as_dict()
@@ -1,11 +1,46 @@
-from fastapi import APIRouter, Depends, status, Request, HTTPException
+import asyncio
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, status, Request, HTTPException, Query, Response, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # custom imports
 from app.database import get_db
+from app.exceptions import PreconditionFailedHTTPException
+from app.utils.constants import (
+    POSTS_PAGE_DEFAULT_LIMIT,
+    POSTS_PAGE_MAX_LIMIT,
+    TRENDING_VIEW_WEIGHT,
+    TRENDING_EDIT_WEIGHT,
+    TRENDING_CREATE_WEIGHT,
+)
 from app.utils.logging import Logger
-from app.schemas.posts import PostsSchema
+from app.utils.etag import etag_matches, weak_etag
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.schemas.posts import (
+    PostsSchema,
+    PostsResponse,
+    PostsPageResponse,
+    PostsImportReport,
+    PostsSearchResponse,
+    PostsTrendingResponse,
+)
 from app.models.posts import Posts
+from app.services.auth import AuthBearer
+from app.services.category import invalidate_category_cache, invalidate_category_caches
+from app.services.importer import import_posts
+from app.services.posts import (
+    get_post_payload,
+    invalidate_post_cache,
+    create_post_data,
+    update_post_data,
+    delete_post_data,
+    get_post_payloads,
+    post_etag,
+)
+from app.services.search import search_posts
+from app.services.trending import bump_trending_post, remove_trending_post, get_trending_posts
+from app.services.views import count_post_view
 
 
 router = APIRouter(prefix="/v1/posts")
@@ -15,29 +50,153 @@ logger = Logger()
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_post(payload: PostsSchema, request: Request, db_session: AsyncSession = Depends(get_db)):
     req_id = request.state.request_id
-    _post: Posts = Posts(**payload.model_dump())
-    await _post.save(db_session)
+    _post: Posts = await create_post_data(db_session, payload)
+    # the post counter is part of the cached category
+    await invalidate_category_cache(request.app.state.redis, _post.category_id)
+    await bump_trending_post(request.app.state.redis, _post.id, _post.category_id, TRENDING_CREATE_WEIGHT)
     logger.log_debug(f"{req_id} | Post {_post.title} created successfully")
     return {"message": "Post created successfully"}
 
 
-@router.get("/{post_id}", status_code=status.HTTP_200_OK)
-async def get_post(post_id: int, request: Request, db_session: AsyncSession = Depends(get_db)):
+# COPY bypasses the per-row checks of the ORM, only authenticated clients may use it
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=PostsImportReport,
+    dependencies=[Depends(AuthBearer())],
+)
+async def bulk_create_posts(
+    request: Request,
+    fmt: Annotated[
+        Literal["jsonl", "csv"] | None,
+        Query(alias="format", description="Body format, guessed from Content-Type if omitted"),
+    ] = None,
+):
     req_id = request.state.request_id
-    _post: Posts = await Posts.find(db_session, [Posts.id == post_id])
-    if not _post:
+    if fmt is None:
+        fmt = "csv" if request.headers.get("Content-Type", "").startswith("text/csv") else "jsonl"
+
+    # the body is consumed chunk by chunk, never loaded as a whole
+    _report = await import_posts(request.app.state.redis, request.stream(), fmt)
+    logger.log_info(f"{req_id} | Bulk import of {_report.inserted_rows}/{_report.total_rows} posts finished")
+    return _report
+
+
+@router.get("/", status_code=status.HTTP_200_OK, response_model=PostsPageResponse)
+async def list_posts(
+    request: Request,
+    category_id: Annotated[int | None, Query(description="Category Id")] = None,
+    cursor: Annotated[str | None, Query(description="Cursor returned by the previous page")] = None,
+    limit: Annotated[int, Query(ge=1, le=POSTS_PAGE_MAX_LIMIT)] = POSTS_PAGE_DEFAULT_LIMIT,
+    db_session: AsyncSession = Depends(get_db),
+):
+    req_id = request.state.request_id
+    after = decode_cursor(cursor, (int, int)) if cursor else None
+
+    # fetch one extra row to find out whether there is a next page
+    _posts = await Posts.find_page(db_session, limit + 1, category_id=category_id, after=after)
+    next_cursor = None
+    if len(_posts) > limit:
+        _posts = _posts[:limit]
+        next_cursor = encode_cursor(_posts[-1].category_id, _posts[-1].id)
+    logger.log_debug(f"{req_id} | {len(_posts)} posts listed successfully (category_id = {category_id})")
+    return {"items": _posts, "next_cursor": next_cursor}
+
+
+@router.get("/search", status_code=status.HTTP_200_OK, response_model=PostsSearchResponse)
+async def search(
+    request: Request,
+    q: Annotated[str, Query(min_length=1, description="Search query")],
+    cursor: Annotated[str | None, Query(description="Cursor returned by the previous page")] = None,
+    limit: Annotated[int, Query(ge=1, le=POSTS_PAGE_MAX_LIMIT)] = POSTS_PAGE_DEFAULT_LIMIT,
+    db_session: AsyncSession = Depends(get_db),
+):
+    req_id = request.state.request_id
+    # the rank is a float, json writes the whole ones as ints
+    after = decode_cursor(cursor, ((float, int), int)) if cursor else None
+
+    _hits = await search_posts(db_session, q, limit + 1, after=after)
+    next_cursor = None
+    if len(_hits) > limit:
+        _hits = _hits[:limit]
+        next_cursor = encode_cursor(_hits[-1].rank, _hits[-1].id)
+    logger.log_debug(f"{req_id} | {len(_hits)} posts found (q = {q})")
+    return {"items": _hits, "next_cursor": next_cursor}
+
+
+@router.get("/trending", status_code=status.HTTP_200_OK, response_model=PostsTrendingResponse)
+async def trending(
+    request: Request,
+    category_id: Annotated[int | None, Query(description="Category Id, all categories if omitted")] = None,
+    limit: Annotated[int, Query(ge=1, le=POSTS_PAGE_MAX_LIMIT)] = POSTS_PAGE_DEFAULT_LIMIT,
+    db_session: AsyncSession = Depends(get_db),
+):
+    req_id = request.state.request_id
+    _redis = request.app.state.redis
+    _scores = await get_trending_posts(_redis, category_id, limit)
+    _payloads = await get_post_payloads(_redis, db_session, [post_id for post_id, _ in _scores])
+    logger.log_debug(f"{req_id} | {len(_payloads)} trending posts retrieved (category_id = {category_id})")
+    return {
+        "items": [
+            {"score": score, "post": PostsResponse.model_validate_json(_payloads[post_id])}
+            for post_id, score in _scores
+            if post_id in _payloads
+        ]
+    }
+
+
+@router.get("/{post_id}", status_code=status.HTTP_200_OK, response_model=PostsResponse)
+async def get_post(
+    post_id: int,
+    request: Request,
+    if_none_match: Annotated[str | None, Header()] = None,
+    db_session: AsyncSession = Depends(get_db),
+):
+    req_id = request.state.request_id
+    _payload = await get_post_payload(request.app.state.redis, db_session, post_id)
+    if not _payload:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
-    logger.log_debug(f"{req_id} | Post {_post.title} retrieved successfully")
-    return _post
+
+    # the ETag is computed from the cached payload, no ORM object is needed to answer a 304
+    _post = PostsResponse.model_validate_json(_payload)
+    _etag = weak_etag(post_etag(_post))
+    # a revalidated read is still a view
+    await asyncio.gather(
+        count_post_view(request.app.state.redis, post_id),
+        bump_trending_post(request.app.state.redis, post_id, _post.category_id, TRENDING_VIEW_WEIGHT),
+    )
+    if etag_matches(if_none_match, _etag):
+        logger.log_debug(f"{req_id} | Post {post_id} not modified")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": _etag})
+
+    logger.log_debug(f"{req_id} | Post {post_id} retrieved successfully")
+    # the cached payload is already serialized, skip the response model round trip
+    return Response(content=_payload, media_type="application/json", headers={"ETag": _etag})
 
 
 @router.patch("/{post_id}", status_code=status.HTTP_200_OK)
-async def update_post(post_id: int, payload: PostsSchema, request: Request, db_session: AsyncSession = Depends(get_db)):
+async def update_post(
+    post_id: int,
+    payload: PostsSchema,
+    request: Request,
+    if_match: Annotated[str | None, Header()] = None,
+    db_session: AsyncSession = Depends(get_db),
+):
     req_id = request.state.request_id
-    _post: Posts = await Posts.find(db_session, [Posts.id == post_id])
+    # lock the row so that the If-Match check and the update see the same version
+    _post: Posts = await Posts.find(db_session, [Posts.id == post_id], for_update=if_match is not None)
     if not _post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
-    await _post.update(db_session, payload.model_dump())
+    if if_match is not None and not etag_matches(if_match, post_etag(_post), weak=False):
+        await db_session.rollback()
+        raise PreconditionFailedHTTPException("Post was modified by another request")
+    _prev_category_id = _post.category_id
+    await update_post_data(db_session, _post, payload)
+    await invalidate_post_cache(request.app.state.redis, post_id)
+    if _post.category_id != _prev_category_id:
+        await invalidate_category_caches(request.app.state.redis, (_prev_category_id, _post.category_id))
+        await remove_trending_post(request.app.state.redis, post_id, _prev_category_id)
+    await bump_trending_post(request.app.state.redis, post_id, _post.category_id, TRENDING_EDIT_WEIGHT)
     logger.log_debug(f"{req_id} | Post {_post.title} updated successfully")
     return {"message": "Post updated successfully"}
 
@@ -48,6 +207,9 @@ async def delete_post(post_id: int, request: Request, db_session: AsyncSession =
     _post: Posts = await Posts.find(db_session, [Posts.id == post_id])
     if not _post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
-    await _post.delete(db_session)
+    await delete_post_data(db_session, _post)
+    await invalidate_post_cache(request.app.state.redis, post_id)
+    await invalidate_category_cache(request.app.state.redis, _post.category_id)
+    await remove_trending_post(request.app.state.redis, post_id, _post.category_id)
     logger.log_debug(f"{req_id} | Post {_post.title} deleted successfully")
     return {"message": "Post deleted successfully"}
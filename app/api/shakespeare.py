@@ -1,10 +1,29 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
+from app.exceptions import NotFoundHTTPException, ServiceNotAvailableHTTPException
 from app.models.shakespeare import Paragraph
+from app.schemas.shakespeare import CharacterNeighbor, ConcordancePage, ParagraphPage, WordformCompletion, WordformMatch
+from app.services.concordance import context_window
+from app.services.paragraphs import stream_paragraphs
+from app.utils.constants import (
+    CONCORDANCE_CONTEXT_CHARS,
+    CONCORDANCE_PAGE_DEFAULT_LIMIT,
+    CONCORDANCE_PAGE_MAX_LIMIT,
+    SHAKESPEARE_PAGE_DEFAULT_LIMIT,
+    SHAKESPEARE_PAGE_MAX_LIMIT,
+    WORDFORM_COMPLETE_DEFAULT_LIMIT,
+    WORDFORM_COMPLETE_MAX_LIMIT,
+    WORDFORM_FUZZY_DEFAULT_DISTANCE,
+    WORDFORM_FUZZY_MAX_DISTANCE,
+)
+from app.utils.etag import etag_matches
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.streaming import NDJSON_MEDIA_TYPE
 
 router = APIRouter(prefix="/v1/shakespeare")
 
@@ -13,7 +32,235 @@ router = APIRouter(prefix="/v1/shakespeare")
     "/",
 )
 async def find_paragraph(
+    request: Request,
     character: Annotated[str, Query(description="Character name")],
+    stream: Annotated[
+        Literal["ndjson", "json"] | None, Query(description="Stream the paragraphs as NDJSON or a JSON array")
+    ] = None,
     db_session: AsyncSession = Depends(get_db),
 ):
+    if stream is not None:
+        # written chunk by chunk, memory stays flat however many lines the character has
+        return StreamingResponse(
+            stream_paragraphs(character, json_array=stream == "json"),
+            media_type="application/json" if stream == "json" else NDJSON_MEDIA_TYPE,
+        )
+    _snapshot = getattr(request.app.state, "snapshot", None)
+    if _snapshot is not None:
+        return _snapshot.character_paragraphs(character)
     return await Paragraph.find(db_session=db_session, character=character)
+
+
+@router.get("/paragraphs", response_model=ParagraphPage)
+async def find_paragraph_page(
+    request: Request,
+    character: Annotated[str, Query(description="Character name")],
+    cursor: Annotated[str | None, Query(description="Cursor returned by the previous page")] = None,
+    limit: Annotated[int, Query(ge=1, le=SHAKESPEARE_PAGE_MAX_LIMIT)] = SHAKESPEARE_PAGE_DEFAULT_LIMIT,
+    db_session: AsyncSession = Depends(get_db),
+):
+    after = decode_cursor(cursor, (str, int)) if cursor else None
+    _snapshot = getattr(request.app.state, "snapshot", None)
+    if _snapshot is not None:
+        _paragraphs = _snapshot.paragraph_projection(character, limit + 1, after=after)
+    else:
+        _paragraphs = await Paragraph.find_projection(db_session, character, limit + 1, after=after)
+    next_cursor = None
+    if len(_paragraphs) > limit:
+        _paragraphs = _paragraphs[:limit]
+        next_cursor = encode_cursor(_paragraphs[-1].work_id, _paragraphs[-1].paragraph_num)
+    return {"items": _paragraphs, "next_cursor": next_cursor}
+
+
+def get_wordform_index(request: Request):
+    _index = getattr(request.app.state, "wordform_index", None)
+    if _index is None:
+        raise ServiceNotAvailableHTTPException("Wordform index is not loaded")
+    return _index
+
+
+def get_wordform_lookup(request: Request):
+    _lookup = getattr(request.app.state, "wordform_lookup", None)
+    if _lookup is None:
+        raise ServiceNotAvailableHTTPException("Wordform lookup is not loaded")
+    return _lookup
+
+
+@router.get("/wordforms/complete", response_model=list[WordformCompletion])
+async def complete_wordform(
+    request: Request,
+    prefix: Annotated[str, Query(description="Beginning of the word")],
+    limit: Annotated[int, Query(ge=1, le=WORDFORM_COMPLETE_MAX_LIMIT)] = WORDFORM_COMPLETE_DEFAULT_LIMIT,
+):
+    # served from memory, no database round trip
+    _completions = get_wordform_index(request).complete(prefix, limit)
+    return [{"plain_text": plain_text, "occurences": occurences} for plain_text, occurences in _completions]
+
+
+@router.get("/wordforms/sounds-like", response_model=list[WordformCompletion])
+async def sounds_like_wordform(
+    request: Request,
+    word: Annotated[str, Query(description="Word, misspellings are matched to the closest known word")],
+    limit: Annotated[int, Query(ge=1, le=WORDFORM_COMPLETE_MAX_LIMIT)] = WORDFORM_COMPLETE_DEFAULT_LIMIT,
+):
+    _words = get_wordform_lookup(request).sounds_like(word, limit)
+    return [{"plain_text": plain_text, "occurences": occurences} for plain_text, occurences in _words]
+
+
+@router.get("/wordforms/inflections", response_model=list[WordformCompletion])
+async def inflections_of_wordform(
+    request: Request,
+    word: Annotated[str, Query(description="Word, misspellings are matched to the closest known word")],
+    limit: Annotated[int, Query(ge=1, le=WORDFORM_COMPLETE_MAX_LIMIT)] = WORDFORM_COMPLETE_DEFAULT_LIMIT,
+):
+    _words = get_wordform_lookup(request).inflections(word, limit)
+    return [{"plain_text": plain_text, "occurences": occurences} for plain_text, occurences in _words]
+
+
+# a plain def: a BK-tree query beyond one edit is pure python CPU, it runs in the threadpool
+@router.get("/wordforms/fuzzy", response_model=list[WordformMatch])
+def fuzzy_wordform(
+    request: Request,
+    word: Annotated[str, Query(description="Possibly misspelled word")],
+    max_distance: Annotated[int, Query(ge=0, le=WORDFORM_FUZZY_MAX_DISTANCE)] = WORDFORM_FUZZY_DEFAULT_DISTANCE,
+    limit: Annotated[int, Query(ge=1, le=WORDFORM_COMPLETE_MAX_LIMIT)] = WORDFORM_COMPLETE_DEFAULT_LIMIT,
+):
+    _matches = get_wordform_lookup(request).fuzzy(word, max_distance, limit)
+    return [
+        {"plain_text": plain_text, "occurences": occurences, "distance": distance}
+        for plain_text, occurences, distance in _matches
+    ]
+
+
+@router.get("/wordforms/stats")
+async def wordform_index_stats(request: Request):
+    return {"index": get_wordform_index(request).stats(), "lookup": get_wordform_lookup(request).stats()}
+
+
+def get_concordance(request: Request):
+    _index = getattr(request.app.state, "concordance", None)
+    if _index is None:
+        raise ServiceNotAvailableHTTPException("Concordance index is not loaded")
+    return _index
+
+
+@router.get("/concordance", response_model=ConcordancePage)
+async def find_concordance(
+    request: Request,
+    word: Annotated[str, Query(description="Word to look up")],
+    inflections: Annotated[bool, Query(description="Also match the words of the same stem")] = False,
+    cursor: Annotated[str | None, Query(description="Cursor returned by the previous page")] = None,
+    limit: Annotated[int, Query(ge=1, le=CONCORDANCE_PAGE_MAX_LIMIT)] = CONCORDANCE_PAGE_DEFAULT_LIMIT,
+    db_session: AsyncSession = Depends(get_db),
+):
+    _index = get_concordance(request)
+    words = {word.lower()}
+    if inflections:
+        words.update(w for w, _ in get_wordform_lookup(request).inflections(word, WORDFORM_COMPLETE_MAX_LIMIT))
+    after = decode_cursor(cursor, (int, int)) if cursor else None
+    _occurrences = _index.find(words, limit + 1, after=after)
+    next_cursor = None
+    if len(_occurrences) > limit:
+        _occurrences = _occurrences[:limit]
+        next_cursor = encode_cursor(*_occurrences[-1][:2])
+
+    # the index only knows offsets, the text and its context come from one query for the page
+    _paragraphs = await Paragraph.find_projection_by_ids(
+        db_session, list({paragraph_id for paragraph_id, _, _ in _occurrences})
+    )
+    items = []
+    for paragraph_id, offset, matched in _occurrences:
+        _paragraph = _paragraphs.get(paragraph_id)
+        if _paragraph is None:
+            continue
+        items.append(
+            {
+                **_paragraph._asdict(),
+                **context_window(_paragraph.plain_text, offset, len(matched), CONCORDANCE_CONTEXT_CHARS),
+            }
+        )
+    return {"words": sorted(words), "total": _index.count(words), "items": items, "next_cursor": next_cursor}
+
+
+@router.get("/concordance/stats")
+async def concordance_stats(request: Request):
+    return get_concordance(request).stats()
+
+
+def get_corpus_stats(request: Request):
+    _stats = getattr(request.app.state, "corpus_stats", None)
+    if _stats is None:
+        raise ServiceNotAvailableHTTPException("Corpus stats are not loaded")
+    return _stats
+
+
+@router.get("/stats")
+async def corpus_stats(request: Request):
+    # precomputed and serialized once, sent as is
+    return Response(content=get_corpus_stats(request).payload, media_type="application/json")
+
+
+@router.get("/stats/works/{work_id}")
+async def work_stats(request: Request, work_id: str):
+    _stats = get_corpus_stats(request).work(work_id)
+    if _stats is None:
+        raise NotFoundHTTPException(f"Work {work_id} not found")
+    return _stats
+
+
+@router.get("/stats/characters/{character_id}")
+async def character_stats(request: Request, character_id: str):
+    _stats = get_corpus_stats(request).character(character_id)
+    if _stats is None:
+        raise NotFoundHTTPException(f"Character {character_id} not found")
+    return _stats
+
+
+def get_work_graph(request: Request, work_id: str):
+    _graphs = getattr(request.app.state, "character_graphs", None)
+    if _graphs is None:
+        raise ServiceNotAvailableHTTPException("Character graphs are not loaded")
+    _graph = _graphs.get(work_id)
+    if _graph is None:
+        raise NotFoundHTTPException(f"Work {work_id} not found")
+    return _graph
+
+
+@router.get("/works/{work_id}/graph")
+async def work_character_graph(request: Request, work_id: str):
+    # precomputed and serialized once, sent as is
+    return Response(content=get_work_graph(request, work_id).payload, media_type="application/json")
+
+
+@router.get("/works/{work_id}/graph/neighbors", response_model=list[CharacterNeighbor])
+async def work_character_neighbors(
+    request: Request,
+    work_id: str,
+    character: Annotated[str, Query(description="Character id")],
+    limit: Annotated[int | None, Query(ge=1, description="Number of neighbors, all by default")] = None,
+):
+    _neighbors = get_work_graph(request, work_id).neighbors(character, limit)
+    if _neighbors is None:
+        raise NotFoundHTTPException(f"Character {character} not found in work {work_id}")
+    return [
+        {"character_id": character_id, "character_name": name, "weight": weight}
+        for character_id, name, weight in _neighbors
+    ]
+
+
+@router.get("/works/{work_id}/toc")
+async def work_toc(
+    request: Request,
+    work_id: str,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    _tocs = getattr(request.app.state, "work_tocs", None)
+    if _tocs is None:
+        raise ServiceNotAvailableHTTPException("Work tables of contents are not loaded")
+    # precomputed at startup: a dict lookup and the bytes as they are
+    _toc = _tocs.get(work_id)
+    if _toc is None:
+        raise NotFoundHTTPException(f"Work {work_id} not found")
+    if etag_matches(if_none_match, _toc.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": _toc.etag})
+    return Response(content=_toc.payload, media_type="application/json", headers={"ETag": _toc.etag})
@@ -13,12 +13,13 @@ from app.schemas.user import (
     create_token_response
 )
 from app.services.auth import (
-    create_access_token,
-    create_refresh_token,
-    get_cached_data_by_refresh_token,
-    invalidate_access_token,
-    invalidate_refresh_token
+    AuthBearer,
+    decode_refresh_token,
+    issue_tokens,
+    revoke_tokens,
+    rotate_tokens
 )
+from app.services.passwords import password_hasher
 from app.utils.logging import Logger
 
 router = APIRouter(prefix="/v1/user")
@@ -26,7 +27,9 @@ logger = Logger()
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=UserResponse)
 async def create_user(payload: UserSchema, request: Request, db_session: AsyncSession = Depends(get_db)):
-    _user: User = User(**payload.model_dump())
+    _data = payload.model_dump()
+    _hashed = await password_hasher.hash(_data.pop("password"))
+    _user: User = User(**_data, _password=_hashed)
     await _user.save(db_session)
     return _user
 
@@ -38,31 +41,23 @@ async def get_token_for_user(user: UserLogin, request: Request, db_session: Asyn
 
     if not _user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    if not _user.check_password(user.password):
+    if not await password_hasher.verify(user.password, _user._password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Password is incorrect")
 
     logger.log_debug(f"{req_id} | User {_user.email} signed in successfully")
 
-    _token = await create_access_token(_user, request)
-    logger.log_debug(f"{req_id} | User {_user.email} access token created successfully")
-    _refresh_token = await create_refresh_token(_user, _token, request)
-    logger.log_debug(f"{req_id} | User {_user.email} refresh token created successfully")
+    _token, _refresh_token = await issue_tokens(_user, request)
+    logger.log_debug(f"{req_id} | User {_user.email} access and refresh tokens created successfully")
     return create_token_response(_token, _refresh_token)
 
 
 @router.post("/signout", status_code=status.HTTP_200_OK)
-async def signout(request: Request):
+async def signout(request: Request, access_token: str = Depends(AuthBearer())):
     req_id = request.state.request_id
 
-    # invalidate access token
-    access_token = request.state.jwt_payload.get("access_token")
-    await invalidate_access_token(access_token, request)
-    logger.log_debug(f"{req_id} | Access token invalidated successfully")
-
-    # invalidate refresh token
-    refresh_token = request.state.jwt_payload.get("refresh_token")
-    await invalidate_refresh_token(refresh_token, request)
-    logger.log_debug(f"{req_id} | Refresh token invalidated successfully")
+    # invalidate the access token and the refresh token issued with it
+    await revoke_tokens(access_token, request)
+    logger.log_debug(f"{req_id} | Access and refresh tokens invalidated successfully")
 
     return {"message": "User signed out successfully"}
 
@@ -73,22 +68,13 @@ async def refresh_token(payload: RefreshTokenSchema, request: Request, db_sessio
     # refresh token
     refresh_token = payload.refresh_token
 
-    user_id, prev_access_token = await get_cached_data_by_refresh_token(refresh_token, request)
+    user_id, prev_access_token = decode_refresh_token(refresh_token)
     _user = await User.find(db_session, [User.id == user_id])
-    logger.log_debug(f"{req_id} | User {_user.email} access token refreshed successfully")
-
-    # invalidate previous access token
-    await invalidate_access_token(prev_access_token, request)
-    logger.log_debug(f"{req_id} | User {_user.email} access token invalidated successfully (access_token = {prev_access_token})")
-    # invalidate previous refresh token
-    await invalidate_refresh_token(refresh_token, request)
-    logger.log_debug(f"{req_id} | User {_user.email} refresh token invalidated successfully (refresh_token = {refresh_token})")
-
-    # create new access token
-    access_token = await create_access_token(_user, request)
-    logger.log_debug(f"{req_id} | User {_user.email} access token created successfully (access_token = {access_token})")
-    # create new refresh token
-    new_refresh_token = await create_refresh_token(_user, access_token, request)
-    logger.log_debug(f"{req_id} | User {_user.email} refresh token created successfully (refresh_token = {new_refresh_token})")
+    if not _user:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid refresh token or expired token.")
+
+    # invalidate the previous tokens and store the new ones at once, a refresh token is used only once
+    access_token, new_refresh_token = await rotate_tokens(_user, refresh_token, prev_access_token, request)
+    logger.log_debug(f"{req_id} | User {_user.email} access token refreshed successfully (access_token = {access_token})")
 
     return create_token_response(access_token, new_refresh_token)
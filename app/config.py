@@ -1,6 +1,7 @@
 import os
+import tempfile
 
-from pydantic import PostgresDsn, RedisDsn
+from pydantic import PostgresDsn, RedisDsn, model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +11,26 @@ class Settings(BaseSettings):
     jwt_algorithm: str = os.getenv("JWT_ALGORITHM")
     jwt_expire: int = os.getenv("JWT_EXPIRE")
     jwt_refresh_key: str = os.getenv("JWT_REFRESH_KEY")
+    jwt_refresh_expire: int = os.getenv("JWT_REFRESH_EXPIRE", 60 * 60 * 24 * 7)
+    # verify access tokens locally with JWT_ACCESS_KEY, redis is then only consulted for revocations
+    jwt_stateless: bool = os.getenv("JWT_STATELESS", False)
+    jwt_access_key: str | None = os.getenv("JWT_ACCESS_KEY")
+    # bcrypt cost factor of new password hashes
+    bcrypt_rounds: int = os.getenv("BCRYPT_ROUNDS", 12)
+    # load the in-memory shakespeare indexes at startup, their routes answer 503 otherwise
+    shakespeare_indexes: bool = os.getenv("SHAKESPEARE_INDEXES", True)
+    corpus_stats_path: str = os.getenv(
+        "CORPUS_STATS_PATH", os.path.join(tempfile.gettempdir(), "board-server", "corpus_stats.json")
+    )
+    # serve the shakespeare routes from a memory-mapped snapshot instead of the database when set
+    shakespeare_snapshot_path: str | None = os.getenv("SHAKESPEARE_SNAPSHOT_PATH")
+
+    @model_validator(mode="after")
+    def check_jwt_access_key(self) -> "Settings":
+        # fail at startup rather than on the first signin
+        if self.jwt_stateless and not self.jwt_access_key:
+            raise ValueError("JWT_ACCESS_KEY is required when JWT_STATELESS is set")
+        return self
 
 
 settings = Settings()
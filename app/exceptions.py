@@ -57,3 +57,11 @@ class ServiceNotAvailableHTTPException(HTTPException):
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=msg if msg else "Service not available",
         )
+
+
+class PreconditionFailedHTTPException(HTTPException):
+    def __init__(self, msg: str):
+        super().__init__(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=msg if msg else "Precondition failed",
+        )
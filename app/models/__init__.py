@@ -1,5 +1,7 @@
 # for Alembic and unit tests
+from app.models.category import *  # noqa
 from app.models.nonsense import *  # noqa
+from app.models.posts import *  # noqa
 from app.models.shakespeare import *  # noqa
 from app.models.stuff import *  # noqa
 from app.models.user import *  # noqa
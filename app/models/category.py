@@ -1,3 +1,5 @@
+from typing import Any
+
 from sqlalchemy import String, select, Integer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import mapped_column
@@ -12,6 +14,16 @@ class Category(Base):
     id = mapped_column(Integer, primary_key=True, autoincrement=True)
     name = mapped_column(String, nullable=False)
     author_id = mapped_column(Integer, nullable=False)
+    # maintained together with the posts of the category, see `app.services.posts`
+    post_count = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+    @classmethod
+    async def find(cls, db_session: AsyncSession, where_conditions: list[Any], for_update: bool = False):
+        stmt = select(cls).where(*where_conditions)
+        if for_update:
+            stmt = stmt.with_for_update()
+        result = await db_session.execute(stmt)
+        return result.scalars().first()
 
     @classmethod
     async def find_by_name(cls, db_session: AsyncSession, name: str):
@@ -1,4 +1,7 @@
-from sqlalchemy import String, select, Integer
+from typing import Any
+
+from sqlalchemy import String, select, Integer, Index, Computed, tuple_
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import mapped_column
 
@@ -8,15 +11,69 @@ from app.models.base import Base
 
 class Posts(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # backs the keyset pagination of `find_page`
+        Index("ix_posts_category_id_id", "category_id", "id"),
+        # backs the full-text search of `app.services.search`
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id = mapped_column(Integer, primary_key=True, autoincrement=True)
     title = mapped_column(String, nullable=False)
     content = mapped_column(String, nullable=False)
     author_id = mapped_column(Integer, nullable=False)
     category_id = mapped_column(Integer, nullable=False)
+    # flushed in batches from redis, see `app.services.views`
+    view_count = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # maintained by postgres, deferred so that regular reads do not load it
+    search_vector = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', content), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
+    @classmethod
+    async def find(cls, db_session: AsyncSession, where_conditions: list[Any], for_update: bool = False):
+        stmt = select(cls).where(*where_conditions)
+        if for_update:
+            stmt = stmt.with_for_update()
+        result = await db_session.execute(stmt)
+        return result.scalars().first()
 
     @classmethod
     async def find_by_title(cls, db_session: AsyncSession, title: str):
         stmt = select(cls).where(cls.title == title)
         result = await db_session.execute(stmt)
         return result.scalar_one_or_none()
+
+    @classmethod
+    async def find_page(
+        cls,
+        db_session: AsyncSession,
+        limit: int,
+        category_id: int | None = None,
+        after: tuple[int, int] | None = None,
+    ):
+        """
+        Fetch one page of posts ordered by (category_id, id) descending, newest first.
+
+        The page starts right after the `after` key instead of using OFFSET, so every page
+        is a single range scan on the (category_id, id) index no matter how deep it is.
+
+        :param db_session:
+        :param limit: maximum number of posts to return
+        :param category_id: only return posts of this category
+        :param after: (category_id, id) of the last post of the previous page
+        :return: list of posts
+        """
+        stmt = select(cls)
+        if category_id is not None:
+            stmt = stmt.where(cls.category_id == category_id)
+        if after is not None:
+            stmt = stmt.where(tuple_(cls.category_id, cls.id) < tuple_(*after))
+        stmt = stmt.order_by(cls.category_id.desc(), cls.id.desc()).limit(limit)
+        result = await db_session.execute(stmt)
+        return result.scalars().all()
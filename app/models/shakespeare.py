@@ -2,13 +2,16 @@ from sqlalchemy import (
     Column,
     ForeignKey,
     ForeignKeyConstraint,
+    Index,
     Integer,
     PrimaryKeyConstraint,
     String,
     Table,
     Text,
     UniqueConstraint,
+    and_,
     select,
+    tuple_,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import relationship
@@ -130,6 +133,8 @@ class Paragraph(Base):
         ),
         ForeignKeyConstraint(["work_id"], ["shakespeare.work.id"], name="paragraph_work_id_fkey"),
         PrimaryKeyConstraint("id", name="paragraph_pkey"),
+        # backs the keyset pagination of `find_projection`
+        Index("paragraph_character_id_work_id_paragraph_num_idx", "character_id", "work_id", "paragraph_num"),
         {"schema": "shakespeare"},
     )
 
@@ -150,9 +155,78 @@ class Paragraph(Base):
     chapter = relationship("Chapter", back_populates="paragraph", lazy="selectin")
     work = relationship("Work", back_populates="paragraph", lazy="selectin")
 
+    @classmethod
+    def select_by_character(cls, character: str):
+        return select(cls).join(Character).join(Chapter).join(Work).where(Character.name == character)
+
     @classmethod
     async def find(cls, db_session: AsyncSession, character: str):
-        stmt = select(cls).join(Character).join(Chapter).join(Work).where(Character.name == character)
+        stmt = cls.select_by_character(character)
         result = await db_session.execute(stmt)
         instance = result.scalars().all()
         return instance
+
+    @classmethod
+    def _projection(cls, *columns):
+        return (
+            select(
+                *columns,
+                cls.work_id,
+                Work.title.label("work_title"),
+                cls.section_number,
+                cls.chapter_number,
+                Chapter.description.label("chapter_description"),
+                cls.paragraph_num,
+                cls.character_id,
+                Character.name.label("character_name"),
+                cls.plain_text,
+                cls.word_count,
+            )
+            .join(Character, cls.character_id == Character.id)
+            .join(
+                Chapter,
+                and_(
+                    Chapter.work_id == cls.work_id,
+                    Chapter.section_number == cls.section_number,
+                    Chapter.chapter_number == cls.chapter_number,
+                ),
+            )
+            .join(Work, cls.work_id == Work.id)
+        )
+
+    @classmethod
+    async def find_projection(
+        cls,
+        db_session: AsyncSession,
+        character: str,
+        limit: int,
+        after: tuple[str, int] | None = None,
+    ):
+        """
+        Fetch one page of the paragraphs of a character with only the columns the client needs.
+
+        Unlike `find`, this is a single query returning plain rows: no ORM objects are built
+        and the selectin relationships are not loaded.
+
+        :param db_session:
+        :param character: character name
+        :param limit: maximum number of paragraphs to return
+        :param after: (work_id, paragraph_num) of the last paragraph of the previous page
+        :return: list of rows ordered by (work_id, paragraph_num)
+        """
+        stmt = cls._projection().where(Character.name == character)
+        if after is not None:
+            stmt = stmt.where(tuple_(cls.work_id, cls.paragraph_num) > tuple_(*after))
+        stmt = stmt.order_by(cls.work_id, cls.paragraph_num).limit(limit)
+        result = await db_session.execute(stmt)
+        return result.all()
+
+    @classmethod
+    async def find_projection_by_ids(cls, db_session: AsyncSession, ids: list[int]) -> dict:
+        """
+        Fetch the projection of the given paragraphs, see `find_projection`.
+
+        :return: dict of paragraph id to row, missing ids are left out
+        """
+        result = await db_session.execute(cls._projection(cls.id).where(cls.id.in_(ids)))
+        return {row.id: row for row in result}
@@ -1,8 +1,6 @@
 import uuid
 from typing import Any
 
-import bcrypt
-from passlib.context import CryptContext
 from sqlalchemy import String, LargeBinary, select
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,10 +9,6 @@ from sqlalchemy.orm import mapped_column, Mapped
 from app.models.base import Base
 
 
-# password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
 class User(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
     email: Mapped[str] = mapped_column(String, nullable=False, unique=True)
@@ -23,17 +17,11 @@ class User(Base):
     nickname: Mapped[str] = mapped_column(String, nullable=False)
     _password: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
 
+    # the bcrypt hash, set and checked through app.services.passwords off the event loop
     @property
     def password(self):
         return self._password.decode("utf-8")
 
-    @password.setter
-    def password(self, password: str):
-        self._password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-
-    def check_password(self, password: str):
-        return pwd_context.verify(password, self.password)
-
     @classmethod
     async def find(cls, database_session: AsyncSession, where_conditions: list[Any]):
         _stmt = select(cls).where(*where_conditions)
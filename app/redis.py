@@ -9,3 +9,15 @@ async def get_redis():
         encoding="utf-8",
         decode_responses=True,
     )
+
+
+# lua scripts registered once per worker, keyed by their source
+_scripts = {}
+
+
+def get_script(redis_client: redis.Redis, source: str):
+    """Return the registered lua script of `source`, it is loaded into redis on first use."""
+    script = _scripts.get(source)
+    if script is None:
+        script = _scripts[source] = redis_client.register_script(source)
+    return script
@@ -10,6 +10,7 @@ class CategorySchema(BaseModel):
     )
 
 class CategoryResponse(BaseModel):
+    model_config = config
     id: int = Field(
         title="Category Id",
         description="Primary Key for Category Table",
@@ -22,3 +23,8 @@ class CategoryResponse(BaseModel):
         title="Author Id",
         description="Id of the user who created the category",
     )
+    post_count: int = Field(
+        default=0,
+        title="Post Count",
+        description="Number of posts in the category",
+    )
@@ -23,6 +23,7 @@ class PostsSchema(BaseModel):
 
 
 class PostsResponse(BaseModel):
+    model_config = config
     id: int = Field(
         title="",
         description="",
@@ -43,3 +44,125 @@ class PostsResponse(BaseModel):
         title="",
         description="",
     )
+    view_count: int = Field(
+        default=0,
+        title="View Count",
+        description="Number of reads of the post, updated every few seconds",
+    )
+
+
+class PostsPageResponse(BaseModel):
+    items: list[PostsResponse] = Field(
+        title="Posts",
+        description="Posts of the requested page",
+    )
+    next_cursor: str | None = Field(
+        default=None,
+        title="Next Cursor",
+        description="Opaque cursor of the next page, null if this is the last page",
+    )
+
+
+class PostsImportError(BaseModel):
+    chunk: int = Field(
+        title="Chunk",
+        description="Index of the chunk the error belongs to",
+    )
+    line: int | None = Field(
+        default=None,
+        title="Line",
+        description="Line number of the rejected row, null if the whole chunk was rejected",
+    )
+    error: str = Field(
+        title="Error",
+        description="Reason of the rejection",
+    )
+
+
+class PostsImportReport(BaseModel):
+    total_rows: int = Field(
+        title="Total Rows",
+        description="Number of rows read from the request body",
+    )
+    inserted_rows: int = Field(
+        title="Inserted Rows",
+        description="Number of rows inserted into the posts table",
+    )
+    failed_rows: int = Field(
+        title="Failed Rows",
+        description="Number of rows rejected by validation or by the database",
+    )
+    chunks: int = Field(
+        title="Chunks",
+        description="Number of chunks sent to the database",
+    )
+    elapsed_seconds: float = Field(
+        title="Elapsed Seconds",
+        description="Wall clock time of the import",
+    )
+    rows_per_second: float = Field(
+        title="Rows Per Second",
+        description="Inserted rows per second",
+    )
+    errors: list[PostsImportError] = Field(
+        title="Errors",
+        description="First errors of the import",
+    )
+
+
+class PostsSearchHit(BaseModel):
+    model_config = config
+    id: int = Field(
+        title="Post Id",
+        description="Primary Key for Posts Table",
+    )
+    title: str = Field(
+        title="Title",
+        description="Title of the post",
+    )
+    author_id: int = Field(
+        title="Author Id",
+        description="Id of the user who wrote the post",
+    )
+    category_id: int = Field(
+        title="Category Id",
+        description="Id of the category of the post",
+    )
+    rank: float = Field(
+        title="Rank",
+        description="Relevance of the post, higher is better",
+    )
+    snippet: str = Field(
+        title="Snippet",
+        description="Fragments of the content with the matched words highlighted",
+    )
+
+
+class PostsSearchResponse(BaseModel):
+    items: list[PostsSearchHit] = Field(
+        title="Hits",
+        description="Posts matching the query, most relevant first",
+    )
+    next_cursor: str | None = Field(
+        default=None,
+        title="Next Cursor",
+        description="Opaque cursor of the next page, null if this is the last page",
+    )
+
+
+class PostsTrendingItem(BaseModel):
+    score: float = Field(
+        title="Score",
+        description="Time-decayed activity score, only meaningful relative to the other items",
+    )
+    post: PostsResponse = Field(
+        title="Post",
+        description="The trending post",
+    )
+
+
+class PostsTrendingResponse(BaseModel):
+    items: list[PostsTrendingItem] = Field(
+        title="Trending Posts",
+        description="Hottest posts first",
+    )
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class Character(BaseModel):
@@ -49,3 +49,60 @@ class Paragraph(BaseModel):
     character: Character
     chapter: Chapter
     work: Work
+
+
+class ParagraphProjection(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    work_id: str
+    work_title: str
+    section_number: int
+    chapter_number: int
+    chapter_description: str
+    paragraph_num: int
+    character_id: str
+    character_name: str
+    plain_text: str
+    word_count: int
+
+
+class ParagraphPage(BaseModel):
+    items: list[ParagraphProjection]
+    next_cursor: str | None = None
+
+
+class WordformCompletion(BaseModel):
+    plain_text: str
+    occurences: int
+
+
+class WordformMatch(BaseModel):
+    plain_text: str
+    occurences: int
+    distance: int
+
+
+class ConcordanceLine(BaseModel):
+    work_id: str
+    work_title: str
+    section_number: int
+    chapter_number: int
+    chapter_description: str
+    paragraph_num: int
+    character_id: str
+    character_name: str
+    left: str
+    match: str
+    right: str
+
+
+class ConcordancePage(BaseModel):
+    words: list[str]
+    total: int
+    items: list[ConcordanceLine]
+    next_cursor: str | None = None
+
+
+class CharacterNeighbor(BaseModel):
+    character_id: str
+    character_name: str
+    weight: int
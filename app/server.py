@@ -6,7 +6,7 @@ from fastapi.middleware.gzip import GZipMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
 import os
-from functools import cache
+from functools import cache, partial
 from pathlib import Path
 import toml
 
@@ -14,11 +14,42 @@ import toml
 from app.api.user import router as user_router
 from app.api.health import router as health_router
 from app.api.category import router as category_router
-from app.services.auth import AuthBearer
+from app.api.posts import router as posts_router
+from app.api.shakespeare import router as shakespeare_router
+from app.services.auth import AuthBearer, drop_cached_token, token_cache
+from app.services.passwords import password_hasher
+from app.services.revocation import revoked_tokens
+from app.services.category import (
+    reconcile_category_post_counts_job,
+    warm_category_cache,
+    drop_cached_category,
+    category_cache,
+)
+from app.services.trending import rebase_trending_scores
+from app.services.views import flush_post_views
+from app.services.character_graph import load_character_graphs
+from app.services.concordance import load_concordance, refresh_concordance
+from app.services.corpus_stats import load_corpus_stats
+from app.services.snapshot import load_snapshot
+from app.services.toc import load_work_tocs
+from app.services.wordforms import load_wordforms
 from app.redis import get_redis
 from app.middlewares import RequestLogger, RequestID
 from app.utils.logging import Logger
 from app.utils.gc_tuning import gc_optimization_on_startup
+from app.config import settings as global_settings
+from app.utils.constants import (
+    AUTH_REVOCATION_CHANNEL,
+    AUTH_REVOKED_TOKENS_SYNC_INTERVAL,
+    AUTH_TOKEN_ID_REVOCATION_CHANNEL,
+    CATEGORY_RECONCILE_INTERVAL,
+    CATEGORY_INVALIDATION_CHANNEL,
+    CONCORDANCE_REFRESH_INTERVAL,
+    POSTS_VIEWS_FLUSH_INTERVAL,
+    TRENDING_REBASE_INTERVAL,
+)
+from app.utils.pubsub import PubSubListener
+from app.utils.tasks import run_periodically, start_background_task, stop_background_tasks
 
 
 @cache
@@ -47,6 +78,20 @@ def get_version_from_pyproject_toml() -> str:
         return os.getenv("VERSION", "x.x.x")
 
 
+async def load_shakespeare_index(name: str, load):
+    """
+    Run one of the shakespeare loads of the startup.
+
+    A failure (e.g. a missing schema or an empty table) is logged and leaves the index
+    unset, its routes answer 503 while the rest of the API starts normally.
+    """
+    try:
+        return await load()
+    except Exception as ex:
+        Logger().log_error(f"Shakespeare {name} not loaded | Error: {ex!r}")
+        return None
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # init logger before app starts up
@@ -56,7 +101,81 @@ async def lifespan(app: FastAPI):
 
     # Load the redis connection
     app.state.redis = await get_redis()
+
+    # warm the in-process caches
+    await warm_category_cache()
+    app.state.snapshot = app.state.wordform_index = app.state.wordform_lookup = None
+    app.state.concordance = app.state.corpus_stats = app.state.character_graphs = app.state.work_tocs = None
+    if global_settings.shakespeare_indexes:
+        app.state.snapshot = await load_shakespeare_index("snapshot", load_snapshot)
+        app.state.wordform_index, app.state.wordform_lookup = await load_shakespeare_index(
+            "wordforms", partial(load_wordforms, app.state.snapshot)
+        ) or (None, None)
+        app.state.concordance = await load_shakespeare_index("concordance", load_concordance)
+        app.state.corpus_stats = await load_shakespeare_index("corpus stats", load_corpus_stats)
+        app.state.character_graphs = await load_shakespeare_index("character graphs", load_character_graphs)
+        app.state.work_tocs = await load_shakespeare_index(
+            "tables of contents", partial(load_work_tocs, app.state.snapshot)
+        )
+
+    # start the background jobs
+    app.state.background_tasks = []
+    app.state.pubsub = PubSubListener(app.state.redis)
+    app.state.pubsub.register(CATEGORY_INVALIDATION_CHANNEL, drop_cached_category, reset=category_cache.clear)
+    app.state.pubsub.register(AUTH_REVOCATION_CHANNEL, drop_cached_token, reset=token_cache.clear)
+    if global_settings.jwt_stateless:
+        await revoked_tokens.sync(app.state.redis)
+        app.state.pubsub.register(AUTH_TOKEN_ID_REVOCATION_CHANNEL, revoked_tokens.handle, reset=revoked_tokens.reset)
+        start_background_task(
+            app,
+            run_periodically(
+                "auth-revoked-tokens-sync",
+                AUTH_REVOKED_TOKENS_SYNC_INTERVAL,
+                partial(revoked_tokens.sync, app.state.redis),
+            ),
+        )
+    start_background_task(app, app.state.pubsub.run())
+    start_background_task(
+        app,
+        run_periodically(
+            "category-reconcile",
+            CATEGORY_RECONCILE_INTERVAL,
+            partial(reconcile_category_post_counts_job, app.state.redis),
+        ),
+    )
+    start_background_task(
+        app,
+        run_periodically(
+            "posts-views-flush",
+            POSTS_VIEWS_FLUSH_INTERVAL,
+            partial(flush_post_views, app.state.redis),
+        ),
+    )
+    start_background_task(
+        app,
+        run_periodically(
+            "posts-trending-rebase",
+            TRENDING_REBASE_INTERVAL,
+            partial(rebase_trending_scores, app.state.redis),
+        ),
+    )
+    if app.state.concordance is not None:
+        start_background_task(
+            app,
+            run_periodically(
+                "shakespeare-concordance-refresh",
+                CONCORDANCE_REFRESH_INTERVAL,
+                partial(refresh_concordance, app.state.concordance),
+            ),
+        )
     yield
+    await stop_background_tasks(app)
+    # flush the views counted since the last run, on failure they stay pending in redis
+    try:
+        await flush_post_views(app.state.redis)
+    except Exception as ex:
+        Logger().log_error(f"Post views not flushed at shutdown | Error: {ex!r}")
+    password_hasher.shutdown()
     # close redis connection and release the resources
     app.state.redis.close()
 
@@ -84,6 +203,8 @@ def init_app(use_rate_limiter:bool=False) -> FastAPI:
 def add_api_routers(app:FastAPI, add_static_files: bool = False) -> None:
     app.include_router(user_router)
     app.include_router(category_router, tags=["Category"], dependencies=[Depends(AuthBearer())])
+    app.include_router(posts_router, tags=["Posts"])
+    app.include_router(shakespeare_router, tags=["Shakespeare"])
     app.include_router(health_router, prefix="/v1/public/health", tags=["Health, Public"])
     app.include_router(health_router, prefix="/v1/health", tags=["Health, Bearer"], dependencies=[Depends(AuthBearer())])
 
@@ -1,4 +1,7 @@
 import time
+import uuid
+from hashlib import blake2b
+
 import jwt
 
 from fastapi import Request, HTTPException
@@ -7,15 +10,168 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 # custom imports
 from app.config import settings as global_settings
 from app.models.user import User
+from app.redis import get_script
+from app.services.revocation import revoked_tokens
+from app.utils.cache import TTLCache
+from app.utils.constants import (
+    AUTH_TOKEN_CACHE_MAX_SIZE,
+    AUTH_TOKEN_CACHE_TTL,
+    AUTH_REVOCATION_CHANNEL,
+    AUTH_REVOKED_TOKENS_KEY,
+    AUTH_TOKEN_ID_REVOCATION_CHANNEL,
+)
+
+# verified tokens of this worker, keyed by digest. Revocations are broadcast on
+# AUTH_REVOCATION_CHANNEL and the short ttl bounds the staleness if one is missed.
+token_cache = TTLCache("auth_tokens", AUTH_TOKEN_CACHE_MAX_SIZE, AUTH_TOKEN_CACHE_TTL)
+
+
+# Revoking an access token deletes it, tells the other workers to drop it from their
+# token cache, and in stateless mode adds its id to the revoked set. Shared by the
+# signout and the rotation scripts, so that each one is a single atomic round trip.
+_REVOKE_ACCESS_FUNCTION = """
+local function revoke_access(access_key, revoked_key, digest, token_id, expires_at)
+    redis.call('DEL', access_key)
+    redis.call('PUBLISH', ARGV[1], digest)
+    if token_id ~= '' then
+        redis.call('ZADD', revoked_key, expires_at, token_id)
+        redis.call('PUBLISH', ARGV[2], token_id .. ' ' .. expires_at)
+    end
+end
+"""
+
+# The signout only knows the refresh token from the access hash, so it is deleted
+# without being declared in KEYS: this script is not cluster safe, it needs a single
+# Redis instance.
+_REVOKE_SCRIPT = _REVOKE_ACCESS_FUNCTION + """
+local refresh_token = redis.call('HGET', KEYS[1], 'refresh_token')
+if refresh_token then
+    redis.call('DEL', refresh_token)
+end
+revoke_access(KEYS[1], KEYS[2], ARGV[3], ARGV[4], ARGV[5])
+return 1
+"""
+
+# The refresh token is deleted first: of two concurrent refreshes, only one finds it.
+# It is the one the old access hash references, every key is declared in KEYS.
+# The hash fields of the new pair follow the revocation arguments: access ttl, number
+# of access arguments, access fields and values, refresh ttl, refresh fields and values.
+_ROTATE_SCRIPT = _REVOKE_ACCESS_FUNCTION + """
+if redis.call('DEL', KEYS[1]) == 0 then
+    return 0
+end
+revoke_access(KEYS[2], KEYS[5], ARGV[3], ARGV[4], ARGV[5])
+local access_length = tonumber(ARGV[7])
+redis.call('HSET', KEYS[3], unpack(ARGV, 8, 7 + access_length))
+redis.call('EXPIRE', KEYS[3], ARGV[6])
+redis.call('HSET', KEYS[4], unpack(ARGV, 9 + access_length))
+redis.call('EXPIRE', KEYS[4], ARGV[8 + access_length])
+return 1
+"""
+
+
+class TokenPayload:
+    """
+    Data of a verified access token, stored as the fields of a Redis hash under the token.
+
+    Decoded once per token: the token cache keeps this object and routes read its
+    attributes. The refresh token is only set on stored tokens, the claims of a
+    stateless token do not carry it.
+    """
+
+    __slots__ = ("id", "email", "nickname", "expiry", "platform", "jti", "refresh_token")
+
+    def __init__(
+        self,
+        id: str,
+        email: str,
+        nickname: str,
+        expiry: float,
+        platform: str | None = None,
+        jti: str | None = None,
+        refresh_token: str | None = None,
+    ) -> None:
+        self.id = id
+        self.email = email
+        self.nickname = nickname
+        self.expiry = expiry
+        self.platform = platform
+        self.jti = jti
+        self.refresh_token = refresh_token
+
+    @classmethod
+    def from_fields(cls, fields: dict[str, str]) -> "TokenPayload":
+        return cls(
+            fields["id"],
+            fields["email"],
+            fields["nickname"],
+            float(fields["expiry"]),
+            fields.get("platform"),
+            fields.get("jti"),
+            fields.get("refresh_token"),
+        )
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "TokenPayload":
+        return cls(
+            claims["id"], claims["email"], claims["nickname"], claims["expiry"], claims.get("platform"), claims["jti"]
+        )
+
+    def fields(self) -> dict[str, str]:
+        # a hash has no null values, the missing ones are left out
+        return {name: str(value) for name in self.__slots__ if (value := getattr(self, name)) is not None}
+
+    def __repr__(self) -> str:
+        # logged by the routes, the refresh token is left out
+        return f"TokenPayload(id={self.id!r}, email={self.email!r}, platform={self.platform!r}, jti={self.jti!r})"
+
+
+def token_digest(token: str) -> str:
+    # the tokens themselves are never published nor kept as cache keys
+    return blake2b(token.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def drop_cached_token(digest: str) -> None:
+    token_cache.pop(digest)
 
 
 async def verify_jwt(request: Request, token: str) -> bool:
-    _payload = await request.app.state.redis.get(token)
-    if _payload:
-        request.state.jwt_payload = _payload
-        return True
-    else:
+    digest = token_digest(token)
+    _payload = token_cache.get(digest)
+    if _payload is None:
+        _fields = await request.app.state.redis.hgetall(token)
+        if not _fields:
+            return False
+        _payload = TokenPayload.from_fields(_fields)
+        token_cache.set(digest, _payload)
+    if _payload.expiry <= time.time():
+        # the cache entry can outlive the token, its ttl is not bounded by the expiry
+        drop_cached_token(digest)
         return False
+    request.state.jwt_payload = _payload
+    return True
+
+
+def decode_access_token(token: str, verify_exp: bool = True) -> dict | None:
+    """Check the signature and expiry of a stateless access token, None if it is invalid."""
+    try:
+        return jwt.decode(
+            token,
+            global_settings.jwt_access_key,
+            algorithms=[global_settings.jwt_algorithm],
+            options={"require": ["exp", "jti"], "verify_exp": verify_exp},
+        )
+    except jwt.InvalidTokenError:
+        return None
+
+
+def verify_jwt_stateless(request: Request, token: str) -> bool:
+    # cpu only: the signature, the expiry and the in-memory mirror of the revoked ids
+    _claims = decode_access_token(token)
+    if _claims is None or _claims["jti"] in revoked_tokens:
+        return False
+    request.state.jwt_payload = TokenPayload.from_claims(_claims)
+    return True
 
 
 class AuthBearer(HTTPBearer):
@@ -27,49 +183,109 @@ class AuthBearer(HTTPBearer):
         if credentials:
             if not credentials.scheme == "Bearer":
                 raise HTTPException(status_code=403, detail="Invalid authentication scheme.")
-            if not await verify_jwt(request, credentials.credentials):
+            if global_settings.jwt_stateless:
+                verified = verify_jwt_stateless(request, credentials.credentials)
+            else:
+                verified = await verify_jwt(request, credentials.credentials)
+            if not verified:
                 raise HTTPException(status_code=403, detail="Invalid token or expired token.")
             return credentials.credentials
         else:
             raise HTTPException(status_code=403, detail="Invalid authorization code.")
 
 
-async def create_access_token(user: User, request: Request):
-    _payload = {
-        "id": user.id,
+def _encode_tokens(user: User, request: Request) -> tuple[str, str, dict, dict]:
+    """Sign a new access/refresh token pair, and build the hash fields stored under each token."""
+    platform = request.headers.get("User-Agent")
+    _expiry = time.time() + global_settings.jwt_expire
+    _access_payload = {
+        "id": str(user.id),
         "email": user.email,
         "nickname": user.nickname,
-        "expiry": time.time() + global_settings.jwt_expire,
-        "platform": request.headers.get("User-Agent"),
+        "expiry": _expiry,
+        "platform": platform,
+        # registered claims, checked by the stateless verification
+        "jti": uuid.uuid4().hex,
+        "exp": int(_expiry),
     }
-    _token = jwt.encode(_payload, str(user.password), algorithm=global_settings.jwt_algorithm)
-
-    _bool = await request.app.state.redis.set(_token, str(_payload), ex=global_settings.jwt_expire)
-    if _bool:
-        return _token
-
+    # stateless tokens are signed with the server key, so that any worker can verify them
+    _key = global_settings.jwt_access_key if global_settings.jwt_stateless else str(user.password)
+    access_token = jwt.encode(_access_payload, _key, algorithm=global_settings.jwt_algorithm)
 
-async def create_refresh_token(user: User, access_token: str, request: Request):
-    _payload = {
+    _refresh_payload = {
         "access_token": access_token,
-        "id": user.id,
+        "id": str(user.id),
         "expiry": time.time() + global_settings.jwt_refresh_expire,
-        "platform": request.headers.get("User-Agent"),
+        "platform": platform,
     }
-    _refresh_token_key = global_settings.jwt_refresh_key
-    _token = jwt.encode(_payload, _refresh_token_key, algorithm=global_settings.jwt_algorithm)
+    refresh_token = jwt.encode(
+        _refresh_payload, global_settings.jwt_refresh_key, algorithm=global_settings.jwt_algorithm
+    )
+    # the access hash references its refresh token, so that a signout revokes both
+    _access_fields = TokenPayload(
+        _access_payload["id"],
+        user.email,
+        user.nickname,
+        _expiry,
+        platform,
+        _access_payload["jti"],
+        refresh_token,
+    ).fields()
+    # a refresh token is checked by its signature, the hash only has to exist
+    _refresh_fields = {"id": _refresh_payload["id"]}
+    return access_token, refresh_token, _access_fields, _refresh_fields
+
+
+def _flatten(fields: dict[str, str]) -> list[str]:
+    return [item for field in fields.items() for item in field]
+
+
+def _revocation_args(access_token: str) -> list:
+    # channel, cache digest, then the token id and expiry revoked in stateless mode
+    token_id, expires_at = "", 0
+    if global_settings.jwt_stateless:
+        _payload = decode_access_token(access_token, verify_exp=False)
+        if _payload is not None:
+            token_id, expires_at = _payload["jti"], _payload["exp"]
+    return [AUTH_REVOCATION_CHANNEL, AUTH_TOKEN_ID_REVOCATION_CHANNEL, token_digest(access_token), token_id, expires_at]
+
 
-    _bool = await request.app.state.redis.set(_token, str(_payload), ex=global_settings.jwt_refresh_expire)
-    if _bool:
-        return _token
+def _revoked_locally(args: list) -> None:
+    # this worker does not wait for its own broadcast
+    _, _, digest, token_id, expires_at = args
+    drop_cached_token(digest)
+    if token_id:
+        revoked_tokens.add(token_id, expires_at)
 
 
-async def get_cached_data_by_refresh_token(refresh_token: str, request: Request) -> tuple:
-    _data = await request.app.state.redis.get(refresh_token)
-    if not _data:
+async def issue_tokens(user: User, request: Request) -> tuple[str, str]:
+    """
+    Create and store a new access/refresh token pair, in one transaction.
+
+    :return: (access token, refresh token)
+    """
+    access_token, refresh_token, access_fields, refresh_fields = _encode_tokens(user, request)
+    async with request.app.state.redis.pipeline(transaction=True) as pipe:
+        pipe.hset(access_token, mapping=access_fields)
+        pipe.expire(access_token, global_settings.jwt_expire)
+        pipe.hset(refresh_token, mapping=refresh_fields)
+        pipe.expire(refresh_token, global_settings.jwt_refresh_expire)
+        await pipe.execute()
+    return access_token, refresh_token
+
+
+def decode_refresh_token(refresh_token: str) -> tuple[str, str]:
+    """
+    Check the signature of a refresh token, whether it is still stored is checked by the rotation.
+
+    :return: (user id, access token issued with it)
+    """
+    try:
+        _decoded = jwt.decode(
+            refresh_token, global_settings.jwt_refresh_key, algorithms=[global_settings.jwt_algorithm]
+        )
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=403, detail="Invalid refresh token or expired token.")
-    # decode the data
-    _decoded = jwt.decode(_data, global_settings.jwt_refresh_key, algorithms=[global_settings.jwt_algorithm])
     _id = _decoded.get("id", None)
     access_token = _decoded.get("access_token", None)
     if not _id or not access_token:
@@ -77,10 +293,41 @@ async def get_cached_data_by_refresh_token(refresh_token: str, request: Request)
     return _id, access_token
 
 
-async def invalidate_access_token(token: str, request: Request):
-    await request.app.state.redis.delete(token)
-    return True
+async def rotate_tokens(user: User, refresh_token: str, access_token: str, request: Request) -> tuple[str, str]:
+    """
+    Swap a refresh token and its access token for a new pair, atomically.
 
-async def invalidate_refresh_token(token: str, request: Request):
-    await request.app.state.redis.delete(token)
-    return True
+    A refresh token is used once: when it is already gone (expired, signed out or used
+    by a concurrent refresh) nothing changes and a 403 is raised.
+
+    :return: (access token, refresh token)
+    """
+    new_access_token, new_refresh_token, access_fields, refresh_fields = _encode_tokens(user, request)
+    args = _revocation_args(access_token)
+    keys = [refresh_token, access_token, new_access_token, new_refresh_token, AUTH_REVOKED_TOKENS_KEY]
+    redis = request.app.state.redis
+    access_args = _flatten(access_fields)
+    rotated = await get_script(redis, _ROTATE_SCRIPT)(
+        keys=keys,
+        args=[
+            *args,
+            global_settings.jwt_expire,
+            len(access_args),
+            *access_args,
+            global_settings.jwt_refresh_expire,
+            *_flatten(refresh_fields),
+        ],
+        client=redis,
+    )
+    if not rotated:
+        raise HTTPException(status_code=403, detail="Invalid refresh token or expired token.")
+    _revoked_locally(args)
+    return new_access_token, new_refresh_token
+
+
+async def revoke_tokens(access_token: str, request: Request) -> None:
+    """Revoke an access token and the refresh token issued with it, in one round trip."""
+    args = _revocation_args(access_token)
+    redis = request.app.state.redis
+    await get_script(redis, _REVOKE_SCRIPT)(keys=[access_token, AUTH_REVOKED_TOKENS_KEY], args=args, client=redis)
+    _revoked_locally(args)
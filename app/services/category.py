@@ -1,28 +1,154 @@
+from collections.abc import Iterable
+
 from fastapi import status, HTTPException
+from redis.asyncio import Redis
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # custom imports
+from app.database import AsyncSessionFactory
+from app.exceptions import PreconditionFailedHTTPException
+from app.utils.cache import TTLCache
+from app.utils.constants import (
+    CATEGORY_RECONCILE_INTERVAL,
+    CATEGORY_RECONCILE_LOCK_KEY,
+    CATEGORY_CACHE_MAX_SIZE,
+    CATEGORY_CACHE_TTL,
+    CATEGORY_INVALIDATION_CHANNEL,
+)
+from app.utils.etag import make_fields_etag, etag_matches, weak_etag
 from app.utils.logging import Logger
-from app.schemas.category import CategorySchema
+from app.schemas.category import CategorySchema, CategoryResponse
 from app.models.category import Category
+from app.models.posts import Posts
 
 
 logger = Logger()
 
+# per worker, keyed by category id
+category_cache = TTLCache("category", CATEGORY_CACHE_MAX_SIZE, CATEGORY_CACHE_TTL)
+
+
+def serialize_category(category: Category) -> str:
+    return CategoryResponse.model_validate(category).model_dump_json()
+
+
+# the post counter changes with the posts of the category, it is left out of the ETag
+CATEGORY_ETAG_FIELDS = ("id", "name", "author_id")
+
+
+def category_etag(category: Category) -> str:
+    return make_fields_etag(category, CATEGORY_ETAG_FIELDS)
+
+
+class CachedCategory:
+    """Serialized category with its ETag, ready to be sent."""
+
+    __slots__ = ("id", "payload", "etag")
+
+    def __init__(self, category: Category) -> None:
+        self.id = category.id
+        self.payload = serialize_category(category)
+        # sent on reads, the body also holds the post counter
+        self.etag = weak_etag(category_etag(category))
+
+
+def _cache_category(category: Category) -> CachedCategory:
+    entry = CachedCategory(category)
+    category_cache.set(entry.id, entry)
+    return entry
+
+
+async def get_cached_category(db_session: AsyncSession, category_id: int) -> CachedCategory | None:
+    entry = category_cache.get(category_id)
+    if entry is not None:
+        return entry
+    _category = await Category.find(db_session, [Category.id == category_id])
+    return _cache_category(_category) if _category else None
 
-async def update_category_data(db_session: AsyncSession, category_id: int, payload: CategorySchema, user_id: int) -> Category:
-    # find category
-    _category: Category = Category.find(db_session, [Category.id == category_id])
+
+def drop_cached_category(category_id: str | int) -> None:
+    category_cache.pop(int(category_id))
+
+
+async def invalidate_category_cache(redis: Redis, category_id: int) -> None:
+    """Drop a category from the cache of this worker and tell the other workers to do the same."""
+    drop_cached_category(category_id)
+    await redis.publish(CATEGORY_INVALIDATION_CHANNEL, category_id)
+
+
+async def invalidate_category_caches(redis: Redis, category_ids: Iterable[int]) -> None:
+    """`invalidate_category_cache` of several categories, e.g. after their post counters changed."""
+    category_ids = set(category_ids)
+    if not category_ids:
+        return
+    async with redis.pipeline(transaction=False) as pipe:
+        for category_id in category_ids:
+            drop_cached_category(category_id)
+            pipe.publish(CATEGORY_INVALIDATION_CHANNEL, category_id)
+        await pipe.execute()
+
+
+async def warm_category_cache() -> int:
+    # only an optimisation, the cache is read through: the startup goes on with an empty cache
+    try:
+        async with AsyncSessionFactory() as db_session:
+            result = await db_session.execute(select(Category).order_by(Category.id).limit(CATEGORY_CACHE_MAX_SIZE))
+            for _category in result.scalars():
+                _cache_category(_category)
+    except Exception as ex:
+        category_cache.clear()
+        logger.log_error(f"Category cache not warmed | Error: {ex!r}")
+        return 0
+    logger.log_info(f"Category cache warmed with {len(category_cache)} categories")
+    return len(category_cache)
+
+
+async def update_category_data(
+    db_session: AsyncSession,
+    category_id: int,
+    payload: CategorySchema,
+    user_id: int,
+    if_match: str | None = None,
+) -> Category:
+    # find category, locked if the update is conditional
+    _category: Category = await Category.find(db_session, [Category.id == category_id], for_update=if_match is not None)
     if not _category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
     if _category.author_id != user_id:
         # only the author can update the category
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Unauthorized user")
+    if if_match is not None and not etag_matches(if_match, category_etag(_category), weak=False):
+        await db_session.rollback()
+        raise PreconditionFailedHTTPException("Category was modified by another request")
 
-    # update category
-    _category.name = payload.name
-
-    # save category
-    _category.update(db_session)
+    # update and save category
+    await _category.update(db_session, name=payload.name)
 
     return _category
+
+
+async def reconcile_category_post_counts(db_session: AsyncSession) -> list[int]:
+    """
+    Recount the posts of every category and fix the counters that drifted.
+
+    :param db_session:
+    :return: ids of the categories whose counter was fixed
+    """
+    actual = select(func.count()).where(Posts.category_id == Category.id).scalar_subquery()
+    stmt = update(Category).where(Category.post_count != actual).values(post_count=actual).returning(Category.id)
+    result = await db_session.execute(stmt)
+    fixed = list(result.scalars())
+    await db_session.commit()
+    if fixed:
+        logger.log_warning(f"Fixed the post counter of {len(fixed)} categories")
+    return fixed
+
+
+async def reconcile_category_post_counts_job(redis: Redis) -> None:
+    # one worker per interval is enough
+    if not await redis.set(CATEGORY_RECONCILE_LOCK_KEY, "1", nx=True, ex=CATEGORY_RECONCILE_INTERVAL // 2):
+        return
+    async with AsyncSessionFactory() as db_session:
+        fixed = await reconcile_category_post_counts(db_session)
+    await invalidate_category_caches(redis, fixed)
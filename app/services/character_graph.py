@@ -0,0 +1,133 @@
+import json
+from array import array
+from collections import Counter, defaultdict
+from itertools import combinations
+from time import perf_counter
+
+from sqlalchemy import select
+
+# custom imports
+from app.database import AsyncSessionFactory
+from app.models.shakespeare import Character, Paragraph, t_character_work
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+
+class WorkGraph:
+    """
+    Weighted co-occurrence graph of the characters of a work, in CSR form.
+
+    Two characters are linked when they both speak in a scene (a chapter of the work),
+    weighted by the number of such scenes. The neighbors of node i are
+    indices[indptr[i]:indptr[i + 1]], sorted by weight descending, so a neighbors query
+    is a slice.
+    """
+
+    __slots__ = ("work_id", "characters", "names", "scenes", "positions", "indptr", "indices", "weights", "payload")
+
+    def __init__(self, work_id: str, names: dict[str, str], scene_casts: list[set[str]]) -> None:
+        self.work_id = work_id
+        self.characters = sorted(names)
+        self.names = [names[character_id] for character_id in self.characters]
+        self.positions = {character_id: i for i, character_id in enumerate(self.characters)}
+
+        scenes = Counter()
+        pairs = Counter()
+        for cast in scene_casts:
+            nodes = sorted(self.positions[character_id] for character_id in cast)
+            scenes.update(nodes)
+            pairs.update(combinations(nodes, 2))
+        self.scenes = array("I", (scenes[i] for i in range(len(self.characters))))
+
+        adjacency = defaultdict(list)
+        for (a, b), weight in pairs.items():
+            adjacency[a].append((weight, b))
+            adjacency[b].append((weight, a))
+        self.indptr, self.indices, self.weights = array("I", [0]), array("I"), array("I")
+        for node in range(len(self.characters)):
+            for weight, neighbor in sorted(adjacency[node], key=lambda edge: (-edge[0], edge[1])):
+                self.indices.append(neighbor)
+                self.weights.append(weight)
+            self.indptr.append(len(self.indices))
+
+        self.payload = json.dumps(
+            {
+                "work_id": work_id,
+                "nodes": [
+                    {"id": character_id, "name": name, "scenes": scene_count}
+                    for character_id, name, scene_count in zip(self.characters, self.names, self.scenes)
+                ],
+                "edges": [
+                    {"source": self.characters[a], "target": self.characters[b], "weight": weight}
+                    for (a, b), weight in sorted(pairs.items())
+                ],
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+    def neighbors(self, character_id: str, limit: int | None = None) -> list[tuple[str, str, int]] | None:
+        """
+        Characters sharing scenes with `character_id`, the closest first.
+
+        :return: list of (character_id, name, weight), None if the character is not in the work
+        """
+        node = self.positions.get(character_id)
+        if node is None:
+            return None
+        start, end = self.indptr[node], self.indptr[node + 1]
+        if limit is not None:
+            end = min(end, start + limit)
+        return [
+            (self.characters[neighbor], self.names[neighbor], weight)
+            for neighbor, weight in zip(self.indices[start:end], self.weights[start:end])
+        ]
+
+
+async def load_character_graphs() -> dict[str, WorkGraph]:
+    """Build the co-occurrence graph of every work with two aggregate queries."""
+    start_time = perf_counter()
+    async with AsyncSessionFactory() as db_session:
+        cast = await db_session.execute(
+            select(t_character_work.c.work_id, Character.id, Character.name).join(
+                Character, t_character_work.c.character_id == Character.id
+            )
+        )
+        names = defaultdict(dict)
+        for work_id, character_id, name in cast:
+            names[work_id][character_id] = name
+
+        speakers = await db_session.execute(
+            select(
+                Paragraph.work_id,
+                Paragraph.section_number,
+                Paragraph.chapter_number,
+                Paragraph.character_id,
+                Character.name,
+            )
+            .join(Character, Paragraph.character_id == Character.id)
+            .group_by(
+                Paragraph.work_id,
+                Paragraph.section_number,
+                Paragraph.chapter_number,
+                Paragraph.character_id,
+                Character.name,
+            )
+        )
+        scene_casts = defaultdict(lambda: defaultdict(set))
+        for work_id, section_number, chapter_number, character_id, name in speakers:
+            # speakers missing from character_work still belong to the graph
+            names[work_id].setdefault(character_id, name)
+            scene_casts[work_id][(section_number, chapter_number)].add(character_id)
+
+    graphs = {
+        work_id: WorkGraph(work_id, work_names, list(scene_casts[work_id].values()))
+        for work_id, work_names in names.items()
+    }
+    logger.log_info(
+        f"Character graphs built | Works: {len(graphs)}"
+        f" | Edges: {sum(len(graph.indices) // 2 for graph in graphs.values())}"
+        f" | Time: {perf_counter() - start_time} seconds"
+    )
+    return graphs
@@ -0,0 +1,137 @@
+import heapq
+import re
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from time import perf_counter
+
+from sqlalchemy import select
+
+# custom imports
+from app.database import AsyncSessionFactory
+from app.models.shakespeare import Paragraph
+from app.utils.constants import CONCORDANCE_BUILD_CHUNK_SIZE
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+# words with inner apostrophes ("ne'er", "o'er") are single tokens
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)*", re.IGNORECASE)
+
+
+def _start(postings: array, after: tuple[int, int]) -> int:
+    # bisection over the (paragraph id, offset) pairs
+    lo, hi = 0, len(postings) // 2
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if (postings[2 * mid], postings[2 * mid + 1]) <= after:
+            lo = mid + 1
+        else:
+            hi = mid
+    return 2 * lo
+
+
+def context_window(text: str, offset: int, length: int, width: int) -> dict[str, str]:
+    """Key word in context: the match at `offset` of `text` with up to `width` characters on each side."""
+    end = offset + length
+    return {"left": text[max(0, offset - width):offset], "match": text[offset:end], "right": text[end:end + width]}
+
+
+class ConcordanceIndex:
+    """
+    Inverted index of the paragraph text: word -> postings of (paragraph id, character offset).
+
+    The postings of a word are one flat unsigned int array of interleaved id/offset pairs
+    in ascending order, about 8 bytes an occurrence. Paragraphs are indexed in id order,
+    so a refresh only appends the paragraphs created since the last one. Edited or
+    deleted paragraphs are not tracked, the corpus is read-only.
+    """
+
+    def __init__(self) -> None:
+        self.postings: dict[str, array] = {}
+        self.last_paragraph_id = 0
+        self.paragraphs = 0
+        self.occurrences = 0
+
+    def add(self, paragraph_id: int, text: str) -> None:
+        if paragraph_id <= self.last_paragraph_id:
+            return
+        for match in TOKEN_PATTERN.finditer(text):
+            word = match.group().lower()
+            postings = self.postings.get(word)
+            if postings is None:
+                postings = self.postings[word] = array("I")
+            postings.append(paragraph_id)
+            postings.append(match.start())
+            self.occurrences += 1
+        self.last_paragraph_id = paragraph_id
+        self.paragraphs += 1
+
+    def count(self, words: Iterable[str]) -> int:
+        return sum(len(self.postings.get(word, ())) // 2 for word in set(words))
+
+    def _iter_postings(self, word: str, after: tuple[int, int] | None) -> Iterator[tuple[int, int, str]]:
+        postings = self.postings.get(word)
+        if postings is None:
+            return
+        for i in range(_start(postings, after) if after else 0, len(postings), 2):
+            yield postings[i], postings[i + 1], word
+
+    def find(
+        self, words: Iterable[str], limit: int, after: tuple[int, int] | None = None
+    ) -> list[tuple[int, int, str]]:
+        """
+        Occurrences of any of `words`, in text order.
+
+        :param words: lower case words
+        :param limit: maximum number of occurrences to return
+        :param after: (paragraph id, offset) of the last occurrence of the previous page
+        :return: list of (paragraph id, offset, word)
+        """
+        merged = heapq.merge(*(self._iter_postings(word, after) for word in set(words)))
+        return list(islice(merged, limit))
+
+    def memory_bytes(self) -> int:
+        return sys.getsizeof(self.postings) + sum(
+            sys.getsizeof(word) + sys.getsizeof(postings) for word, postings in self.postings.items()
+        )
+
+    def stats(self) -> dict:
+        return {
+            "paragraphs": self.paragraphs,
+            "words": len(self.postings),
+            "occurrences": self.occurrences,
+            "last_paragraph_id": self.last_paragraph_id,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+async def refresh_concordance(index: ConcordanceIndex) -> None:
+    """Index the paragraphs created since the last refresh, all of them the first time."""
+    start_time = perf_counter()
+    paragraphs = index.paragraphs
+    stmt = (
+        select(Paragraph.id, Paragraph.plain_text)
+        .where(Paragraph.id > index.last_paragraph_id)
+        .order_by(Paragraph.id)
+        .execution_options(yield_per=CONCORDANCE_BUILD_CHUNK_SIZE)
+    )
+    async with AsyncSessionFactory() as db_session:
+        result = await db_session.stream(stmt)
+        async for rows in result.partitions():
+            for paragraph_id, plain_text in rows:
+                index.add(paragraph_id, plain_text)
+    if index.paragraphs > paragraphs:
+        logger.log_info(
+            f"Concordance index refreshed | Paragraphs: +{index.paragraphs - paragraphs}"
+            f" | Time: {perf_counter() - start_time} seconds | Memory: {index.memory_bytes()} bytes"
+        )
+
+
+async def load_concordance() -> ConcordanceIndex:
+    """Build the concordance index of every paragraph."""
+    index = ConcordanceIndex()
+    await refresh_concordance(index)
+    return index
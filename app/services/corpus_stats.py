@@ -0,0 +1,211 @@
+import asyncio
+import json
+import os
+from array import array
+from pathlib import Path
+from time import perf_counter, time
+
+import numpy as np
+from sqlalchemy import func, select
+
+# custom imports
+from app.config import settings
+from app.database import AsyncSessionFactory
+from app.models.shakespeare import Paragraph
+from app.services.concordance import TOKEN_PATTERN
+from app.utils.constants import CORPUS_STATS_SPEECH_LENGTH_BINS, CORPUS_STATS_TOP_WORDS
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+
+class CorpusStats:
+    """Precomputed corpus statistics: the serialized document and its parsed form for lookups."""
+
+    __slots__ = ("payload", "document")
+
+    def __init__(self, payload: bytes) -> None:
+        self.payload = payload
+        self.document = json.loads(payload)
+
+    def work(self, work_id: str) -> dict | None:
+        return self.document["works"].get(work_id)
+
+    def character(self, character_id: str) -> dict | None:
+        return self.document["characters"].get(character_id)
+
+
+def _tokenize(texts: list[str]) -> tuple[np.ndarray, np.ndarray, list[str]]:
+    # the only per-word python loop: map every token to an integer id
+    vocabulary = {}
+    token_ids = array("i")
+    tokens_per_text = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        words = TOKEN_PATTERN.findall(text)
+        tokens_per_text[i] = len(words)
+        token_ids.extend(vocabulary.setdefault(word.lower(), len(vocabulary)) for word in words)
+    return np.frombuffer(token_ids, dtype=np.intc).astype(np.int64), tokens_per_text, list(vocabulary)
+
+
+def _group_stats(
+    groups: np.ndarray,
+    n_groups: int,
+    word_counts: np.ndarray,
+    char_counts: np.ndarray,
+    tokens: np.ndarray,
+    token_paragraphs: np.ndarray,
+    words: list[str],
+) -> list[dict]:
+    """
+    Statistics of the paragraphs grouped by `groups` (a group number per paragraph).
+
+    Every statistic is computed for all the groups at once with bincount, sorting or
+    histogram binning over flat arrays.
+    """
+    # speech lengths
+    speeches = np.bincount(groups, minlength=n_groups)
+    safe_speeches = np.maximum(speeches, 1)
+    mean_words = np.bincount(groups, weights=word_counts, minlength=n_groups) / safe_speeches
+    mean_chars = np.bincount(groups, weights=char_counts, minlength=n_groups) / safe_speeches
+    max_words = np.zeros(n_groups, dtype=np.int64)
+    np.maximum.at(max_words, groups, word_counts)
+    by_length = np.lexsort((word_counts, groups))
+    # trailing sentinel, so that the indexes of empty groups stay in bounds
+    sorted_lengths = np.append(word_counts[by_length], 0)
+    starts = np.concatenate(([0], np.cumsum(speeches)[:-1]))
+    low = starts + np.maximum(speeches - 1, 0) // 2
+    high = starts + speeches // 2
+    median_words = np.where(speeches > 0, (sorted_lengths[low] + sorted_lengths[high]) / 2, 0)
+    n_bins = len(CORPUS_STATS_SPEECH_LENGTH_BINS)
+    bins = np.clip(np.digitize(word_counts, CORPUS_STATS_SPEECH_LENGTH_BINS) - 1, 0, n_bins - 1)
+    histograms = np.bincount(groups * n_bins + bins, minlength=n_groups * n_bins).reshape(n_groups, n_bins)
+
+    # word frequencies, keyed by (group, word) packed in one integer
+    token_groups = groups[token_paragraphs]
+    n_tokens = np.bincount(token_groups, minlength=n_groups)
+    keys, counts = np.unique(token_groups * len(words) + tokens, return_counts=True)
+    key_groups, key_words = np.divmod(keys, len(words)) if words else (keys, keys)
+    vocabulary = np.bincount(key_groups, minlength=n_groups)
+    hapax = np.bincount(key_groups, weights=counts == 1, minlength=n_groups).astype(np.int64)
+
+    # top-k words: sort by group then count descending, keep the first k ranks of each group
+    order = np.lexsort((key_words, -counts, key_groups))
+    ranked_groups = key_groups[order]
+    group_starts = np.searchsorted(ranked_groups, np.arange(n_groups))
+    ranks = np.arange(len(order)) - group_starts[ranked_groups]
+    top = order[ranks < CORPUS_STATS_TOP_WORDS]
+    top_bounds = np.searchsorted(key_groups[top], np.arange(n_groups + 1))
+
+    safe_tokens = np.maximum(n_tokens, 1)
+    type_token_ratio = vocabulary / safe_tokens
+    guiraud_index = vocabulary / np.sqrt(safe_tokens)
+    hapax_ratio = hapax / np.maximum(vocabulary, 1)
+
+    top_words, top_counts = key_words[top].tolist(), counts[top].tolist()
+    columns = {
+        "speeches": speeches.tolist(),
+        "words": n_tokens.tolist(),
+        "mean_speech_words": mean_words.round(2).tolist(),
+        "median_speech_words": median_words.tolist(),
+        "max_speech_words": max_words.tolist(),
+        "mean_speech_chars": mean_chars.round(2).tolist(),
+        "speech_length_histogram": histograms.tolist(),
+        "vocabulary": vocabulary.tolist(),
+        "hapax_legomena": hapax.tolist(),
+        "type_token_ratio": type_token_ratio.round(4).tolist(),
+        "guiraud_index": guiraud_index.round(4).tolist(),
+        "hapax_ratio": hapax_ratio.round(4).tolist(),
+    }
+    bounds = top_bounds.tolist()
+    return [
+        {
+            **{name: values[group] for name, values in columns.items()},
+            "top_words": [
+                [words[top_words[i]], top_counts[i]] for i in range(bounds[group], bounds[group + 1])
+            ],
+        }
+        for group in range(n_groups)
+    ]
+
+
+def compute_corpus_stats(
+    work_ids: list[str], character_ids: list[str], char_counts: list[int], word_counts: list[int], texts: list[str]
+) -> dict:
+    """
+    Corpus, per work and per character statistics of the paragraphs (one entry per paragraph in each list).
+
+    :return: document with the "corpus", "works" and "characters" statistics
+    """
+    tokens, tokens_per_paragraph, words = _tokenize(texts)
+    token_paragraphs = np.repeat(np.arange(len(texts)), tokens_per_paragraph)
+    word_counts = np.asarray(word_counts, dtype=np.int64)
+    char_counts = np.asarray(char_counts, dtype=np.int64)
+    arrays = (word_counts, char_counts, tokens, token_paragraphs, words)
+
+    work_keys, works = np.unique(np.asarray(work_ids, dtype=object), return_inverse=True)
+    character_keys, characters = np.unique(np.asarray(character_ids, dtype=object), return_inverse=True)
+    return {
+        "speech_length_bins": list(CORPUS_STATS_SPEECH_LENGTH_BINS),
+        "corpus": _group_stats(np.zeros(len(texts), dtype=np.int64), 1, *arrays)[0],
+        "works": dict(zip(work_keys.tolist(), _group_stats(works, len(work_keys), *arrays))),
+        "characters": dict(zip(character_keys.tolist(), _group_stats(characters, len(character_keys), *arrays))),
+    }
+
+
+def _read_cache(path: Path) -> bytes | None:
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def _write_cache(path: Path, payload: bytes) -> None:
+    # write then rename, so that another worker never reads a partial file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
+
+
+async def load_corpus_stats(path: str = settings.corpus_stats_path) -> CorpusStats:
+    """
+    Load the corpus statistics from the cache file, computing them again if the paragraphs changed.
+
+    The file is keyed by the paragraph count and highest id, the corpus is otherwise read-only.
+    """
+    path = Path(path)
+    async with AsyncSessionFactory() as db_session:
+        result = await db_session.execute(select(func.count(Paragraph.id), func.max(Paragraph.id)))
+        count, max_id = result.one()
+        fingerprint = {"paragraphs": count, "max_paragraph_id": max_id}
+
+        payload = await asyncio.to_thread(_read_cache, path)
+        if payload is not None:
+            stats = CorpusStats(payload)
+            if stats.document.get("fingerprint") == fingerprint:
+                return stats
+
+        start_time = perf_counter()
+        result = await db_session.execute(
+            select(
+                Paragraph.work_id,
+                Paragraph.character_id,
+                Paragraph.char_count,
+                Paragraph.word_count,
+                Paragraph.plain_text,
+            )
+        )
+        columns = [list(column) for column in zip(*result.tuples())] or [[], [], [], [], []]
+
+    # numpy releases the GIL for most of the work, keep the event loop free meanwhile
+    document = await asyncio.to_thread(compute_corpus_stats, *columns)
+    document["fingerprint"] = fingerprint
+    document["generated_at"] = time()
+    payload = json.dumps(document, separators=(",", ":")).encode("utf-8")
+    await asyncio.to_thread(_write_cache, path, payload)
+    logger.log_info(
+        f"Corpus stats computed | Paragraphs: {count} | Time: {perf_counter() - start_time} seconds"
+        f" | Size: {len(payload)} bytes"
+    )
+    return CorpusStats(payload)
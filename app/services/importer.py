@@ -0,0 +1,167 @@
+import codecs
+import csv
+import json
+from collections import Counter
+from collections.abc import AsyncIterator
+from time import time
+
+from asyncpg import PostgresError
+from pydantic import ValidationError
+from redis.asyncio import Redis
+
+# custom imports
+from app.database import engine
+from app.models.category import Category
+from app.models.posts import Posts
+from app.schemas.posts import PostsSchema, PostsImportReport
+from app.services.category import invalidate_category_caches
+from app.utils.constants import POSTS_IMPORT_CHUNK_SIZE, POSTS_IMPORT_MAX_REPORTED_ERRORS
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+POSTS_IMPORT_COLUMNS = ("title", "content", "author_id", "category_id")
+
+
+async def aiter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into text lines without buffering more than one partial line."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def _iter_jsonl(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line), None
+        except ValueError as ex:
+            yield line_no, None, str(ex)
+
+
+async def _iter_csv(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    header = None
+    record, first_line_no, line_no = None, 0, 0
+    async for line in lines:
+        line_no += 1
+        if record is None:
+            if not line.strip():
+                continue
+            record, first_line_no = line, line_no
+        else:
+            # a quoted field spans several lines
+            record += "\n" + line
+        if record.count('"') % 2:
+            continue
+
+        values = next(csv.reader([record]))
+        record = None
+        if header is None:
+            header = values
+        elif len(values) != len(header):
+            yield first_line_no, None, f"expected {len(header)} fields, got {len(values)}"
+        else:
+            yield first_line_no, dict(zip(header, values)), None
+
+    if record is not None:
+        yield first_line_no, None, "unterminated quoted field"
+
+
+async def import_posts(
+    redis: Redis, stream: AsyncIterator[bytes], fmt: str, chunk_size: int = POSTS_IMPORT_CHUNK_SIZE
+) -> PostsImportReport:
+    """
+    Stream a JSONL or CSV body into the posts table with COPY, one chunk per transaction.
+
+    Only the current chunk is kept in memory. Invalid rows are skipped and a chunk
+    rejected by the database is rolled back without stopping the import.
+
+    :param redis: to invalidate the cached categories whose counters changed
+    :param stream: request body
+    :param fmt: "jsonl" or "csv" (with a header line)
+    :param chunk_size: number of rows per COPY
+    :return: import report
+    """
+    rows = _iter_csv(aiter_lines(stream)) if fmt == "csv" else _iter_jsonl(aiter_lines(stream))
+    errors = []
+    total_rows = inserted_rows = failed_rows = chunks = 0
+
+    def add_error(chunk: int, line: int | None, error: str):
+        if len(errors) < POSTS_IMPORT_MAX_REPORTED_ERRORS:
+            errors.append({"chunk": chunk, "line": line, "error": error})
+
+    start_time = time()
+    async with engine.connect() as conn:
+        raw_conn = await conn.get_raw_connection()
+        driver_conn = raw_conn.driver_connection
+
+        async def flush(records: list[tuple]):
+            nonlocal inserted_rows, failed_rows, chunks
+            chunk_start = time()
+            try:
+                async with driver_conn.transaction():
+                    await driver_conn.copy_records_to_table(
+                        Posts.__tablename__, records=records, columns=POSTS_IMPORT_COLUMNS
+                    )
+                    # keep the category counters in step with the chunk
+                    category_counts = Counter(record[POSTS_IMPORT_COLUMNS.index("category_id")] for record in records)
+                    await driver_conn.executemany(
+                        f"UPDATE {Category.__tablename__} SET post_count = post_count + $2 WHERE id = $1",
+                        category_counts.items(),
+                    )
+            except PostgresError as ex:
+                failed_rows += len(records)
+                add_error(chunks, None, repr(ex))
+                logger.log_error(f"Posts import chunk {chunks} failed | Rows: {len(records)} | Error: {ex!r}")
+            else:
+                await invalidate_category_caches(redis, category_counts)
+                inserted_rows += len(records)
+                elapsed = time() - chunk_start
+                logger.log_debug(
+                    f"Posts import chunk {chunks} | Rows: {len(records)} | Time: {elapsed} seconds"
+                    f" | {len(records) / elapsed if elapsed else 0:.0f} rows/s"
+                )
+            chunks += 1
+
+        records = []
+        async for line_no, row, error in rows:
+            total_rows += 1
+            if error is None:
+                try:
+                    _post = PostsSchema.model_validate(row)
+                    records.append(tuple(getattr(_post, column) for column in POSTS_IMPORT_COLUMNS))
+                except ValidationError as ex:
+                    error = str(ex)
+            if error is not None:
+                failed_rows += 1
+                add_error(chunks, line_no, error)
+                continue
+            if len(records) >= chunk_size:
+                await flush(records)
+                records = []
+        if records:
+            await flush(records)
+
+    elapsed = time() - start_time
+    logger.log_info(f"Posts import finished | Rows: {inserted_rows}/{total_rows} | Time: {elapsed} seconds")
+    return PostsImportReport(
+        total_rows=total_rows,
+        inserted_rows=inserted_rows,
+        failed_rows=failed_rows,
+        chunks=chunks,
+        elapsed_seconds=elapsed,
+        rows_per_second=inserted_rows / elapsed if elapsed else 0.0,
+        errors=errors,
+    )
@@ -0,0 +1,44 @@
+from collections.abc import AsyncIterator
+
+# custom imports
+from app.database import AsyncSessionFactory
+from app.models.shakespeare import Paragraph
+from app.schemas.shakespeare import Paragraph as ParagraphSchema
+from app.utils.constants import SHAKESPEARE_STREAM_CHUNK_SIZE
+
+
+async def stream_paragraphs(
+    character: str, json_array: bool = False, chunk_size: int = SHAKESPEARE_STREAM_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    Stream the paragraphs of a character, with their character, chapter and work, as they are fetched.
+
+    Rows come from a server-side cursor `chunk_size` at a time (the selectin relationships
+    are loaded per chunk), and each chunk is written before the next one is fetched.
+    The generator owns its session because it outlives the request dependencies.
+
+    :param character: character name
+    :param json_array: write one JSON array instead of NDJSON
+    :param chunk_size: rows per fetch and per written chunk
+    :return: NDJSON or JSON array chunks
+    """
+    stmt = Paragraph.select_by_character(character).execution_options(yield_per=chunk_size)
+    separator = b"," if json_array else b"\n"
+    first = True
+    if json_array:
+        yield b"["
+    async with AsyncSessionFactory() as db_session:
+        result = await db_session.stream_scalars(stmt)
+        async for paragraphs in result.partitions():
+            chunk = separator.join(
+                ParagraphSchema.model_validate(paragraph, from_attributes=True).model_dump_json().encode("utf-8")
+                for paragraph in paragraphs
+            )
+            if json_array:
+                # the separator goes between the chunks, not after the last one
+                yield chunk if first else separator + chunk
+                first = False
+            else:
+                yield chunk + separator
+    if json_array:
+        yield b"]"
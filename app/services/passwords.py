@@ -0,0 +1,76 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import bcrypt
+
+# custom imports
+from app.config import settings as global_settings
+from app.exceptions import ServiceNotAvailableHTTPException
+from app.utils.constants import PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_WORKERS
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing and verification on a bounded thread pool.
+
+    bcrypt releases the GIL while it hashes, so threads run in parallel and the event
+    loop stays free. At most `max_pending` calls are queued or running: the next one is
+    rejected with a 503 instead of waiting behind a signin burst.
+    """
+
+    def __init__(self, workers: int, max_pending: int, rounds: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.log_warning(f"Password hasher saturated | Pending: {self.pending}")
+            raise ServiceNotAvailableHTTPException("Too many authentication requests, retry later")
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        start_time = perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+            self.total_seconds += perf_counter() - start_time
+
+    async def hash(self, password: str) -> bytes:
+        return await self._run(bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(self.rounds))
+
+    async def verify(self, password: str, hashed: bytes) -> bool:
+        # the cost factor is read from the hash, older hashes keep verifying after a change of rounds
+        return await self._run(bcrypt.checkpw, password.encode("utf-8"), hashed)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def as_dict(self) -> dict:
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            # queueing included
+            "mean_seconds": self.total_seconds / self.completed if self.completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, global_settings.bcrypt_rounds)
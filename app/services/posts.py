@@ -0,0 +1,250 @@
+import asyncio
+import random
+from collections.abc import AsyncIterator
+
+from fastapi import status, HTTPException
+from redis.asyncio import Redis
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# custom imports
+from app.database import AsyncSessionFactory
+from app.models.category import Category
+from app.models.posts import Posts
+from app.redis import get_script
+from app.schemas.posts import PostsSchema, PostsResponse
+from app.utils.cache import register_cache_stats
+from app.utils.etag import make_fields_etag
+from app.utils.constants import (
+    POSTS_CACHE_KEY_PREFIX,
+    POSTS_CACHE_TTL,
+    POSTS_CACHE_TTL_JITTER,
+    POSTS_CACHE_LOCK_TTL_MS,
+    POSTS_CACHE_LOCK_WAIT,
+    POSTS_CACHE_LOCK_RETRIES,
+    POSTS_EXPORT_CHUNK_SIZE,
+)
+from app.utils.logging import Logger
+from app.utils.streaming import ndjson_chunk
+
+
+logger = Logger()
+cache_stats = register_cache_stats("posts")
+
+
+# A loader that read the row before an update committed must not cache it after the
+# invalidation. Invalidations bump a generation per post, and a payload is only set if
+# the generation read before the query is still the current one.
+_SET_IF_CURRENT_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+def post_cache_key(post_id: int) -> str:
+    return f"{POSTS_CACHE_KEY_PREFIX}{post_id}"
+
+
+def post_generation_key(post_id: int) -> str:
+    return f"{POSTS_CACHE_KEY_PREFIX}{post_id}:gen"
+
+
+def _cache_ttl() -> int:
+    # jitter the ttl so that posts cached together do not expire together
+    return POSTS_CACHE_TTL + random.randint(0, POSTS_CACHE_TTL_JITTER)
+
+
+def _set_if_current(redis: Redis, post_id: int, generation: str | None, payload: str, client=None):
+    # client: a pipeline of redis to queue the call on, redis itself by default
+    return get_script(redis, _SET_IF_CURRENT_SCRIPT)(
+        keys=[post_cache_key(post_id), post_generation_key(post_id)],
+        args=[generation or "0", payload, _cache_ttl()],
+        client=client or redis,
+    )
+
+
+def serialize_post(post: Posts) -> str:
+    return PostsResponse.model_validate(post).model_dump_json()
+
+
+# the view counter changes on every flush, an ETag over it would fail the If-Match of a reader
+POSTS_ETAG_FIELDS = ("id", "title", "content", "author_id", "category_id")
+
+
+def post_etag(post: Posts | PostsResponse) -> str:
+    return make_fields_etag(post, POSTS_ETAG_FIELDS)
+
+
+async def _load_post_payload(redis: Redis, db_session: AsyncSession, post_id: int) -> str | None:
+    generation = await redis.get(post_generation_key(post_id))
+    _post = await Posts.find(db_session, [Posts.id == post_id])
+    if not _post:
+        return None
+    payload = serialize_post(_post)
+    await _set_if_current(redis, post_id, generation, payload)
+    return payload
+
+
+async def get_post_payload(redis: Redis, db_session: AsyncSession, post_id: int) -> str | None:
+    """
+    Read-through cache of the serialized `PostsResponse` of a post.
+
+    On a miss only the request holding the rebuild lock goes to the database,
+    concurrent requests for the same post wait for it to fill the cache.
+
+    :param redis:
+    :param db_session:
+    :param post_id:
+    :return: serialized post, or None if the post does not exist
+    """
+    key = post_cache_key(post_id)
+    payload = await redis.get(key)
+    if payload is not None:
+        cache_stats.hit()
+        return payload
+    cache_stats.miss()
+
+    lock_key = f"{key}:lock"
+    if await redis.set(lock_key, "1", nx=True, px=POSTS_CACHE_LOCK_TTL_MS):
+        try:
+            return await _load_post_payload(redis, db_session, post_id)
+        finally:
+            await redis.delete(lock_key)
+
+    for _ in range(POSTS_CACHE_LOCK_RETRIES):
+        await asyncio.sleep(POSTS_CACHE_LOCK_WAIT)
+        payload = await redis.get(key)
+        if payload is not None:
+            return payload
+        if not await redis.exists(lock_key):
+            # the lock holder gave up or the post does not exist
+            break
+
+    logger.log_warning(f"Post cache rebuild of {post_id} did not finish in time, reading through")
+    return await _load_post_payload(redis, db_session, post_id)
+
+
+async def get_post_payloads(redis: Redis, db_session: AsyncSession, post_ids: list[int]) -> dict[int, str]:
+    """
+    Batched `get_post_payload`: one MGET, then one query for all the missed posts.
+
+    :param redis:
+    :param db_session:
+    :param post_ids:
+    :return: serialized posts by id, deleted posts are left out
+    """
+    if not post_ids:
+        return {}
+    cached = await redis.mget([post_cache_key(post_id) for post_id in post_ids])
+    payloads = {post_id: payload for post_id, payload in zip(post_ids, cached) if payload is not None}
+    missed = [post_id for post_id in post_ids if post_id not in payloads]
+    cache_stats.hit(len(payloads))
+    if not missed:
+        return payloads
+
+    cache_stats.miss(len(missed))
+    generations = dict(zip(missed, await redis.mget([post_generation_key(post_id) for post_id in missed])))
+    result = await db_session.execute(select(Posts).where(Posts.id.in_(missed)))
+    async with redis.pipeline(transaction=False) as pipe:
+        for _post in result.scalars():
+            payloads[_post.id] = serialize_post(_post)
+            _set_if_current(redis, _post.id, generations[_post.id], payloads[_post.id], client=pipe)
+        await pipe.execute()
+    return payloads
+
+
+async def invalidate_post_caches(redis: Redis, post_ids) -> None:
+    async with redis.pipeline(transaction=True) as pipe:
+        for post_id in post_ids:
+            pipe.delete(post_cache_key(post_id))
+            pipe.incr(post_generation_key(post_id))
+            # outlives any loader still running, a lost generation only costs a miss
+            pipe.expire(post_generation_key(post_id), POSTS_CACHE_TTL)
+        await pipe.execute()
+
+
+async def invalidate_post_cache(redis: Redis, post_id: int) -> None:
+    await invalidate_post_caches(redis, (post_id,))
+
+
+def _bump_post_count(category_id: int, delta: int):
+    return (
+        update(Category)
+        .where(Category.id == category_id)
+        .values(post_count=Category.post_count + delta)
+    )
+
+
+async def create_post_data(db_session: AsyncSession, payload: PostsSchema) -> Posts:
+    """Create a post and count it in its category within the same transaction."""
+    _post = Posts(**payload.model_dump())
+    try:
+        db_session.add(_post)
+        await db_session.execute(_bump_post_count(_post.category_id, 1))
+        await db_session.commit()
+    except SQLAlchemyError as ex:
+        await db_session.rollback()
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=repr(ex)) from ex
+    finally:
+        await db_session.close()
+    return _post
+
+
+async def update_post_data(db_session: AsyncSession, post: Posts, payload: PostsSchema) -> Posts:
+    """Update a post, moving it between the counters if its category changes."""
+    prev_category_id = post.category_id
+    try:
+        for k, v in payload.model_dump().items():
+            setattr(post, k, v)
+        if post.category_id != prev_category_id:
+            await db_session.execute(_bump_post_count(prev_category_id, -1))
+            await db_session.execute(_bump_post_count(post.category_id, 1))
+        await db_session.commit()
+    except SQLAlchemyError as ex:
+        await db_session.rollback()
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=repr(ex)) from ex
+    finally:
+        await db_session.close()
+    return post
+
+
+async def delete_post_data(db_session: AsyncSession, post: Posts) -> bool:
+    """Delete a post and uncount it from its category within the same transaction."""
+    try:
+        await db_session.delete(post)
+        await db_session.execute(_bump_post_count(post.category_id, -1))
+        await db_session.commit()
+    except SQLAlchemyError as ex:
+        await db_session.rollback()
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=repr(ex)) from ex
+    finally:
+        await db_session.close()
+    return True
+
+
+async def stream_category_posts(category_id: int, chunk_size: int = POSTS_EXPORT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Stream the posts of a category as NDJSON through a server-side cursor.
+
+    Rows are fetched and written `chunk_size` at a time, so memory stays flat whatever
+    the size of the category. The generator owns its session because it outlives the
+    request dependencies.
+
+    :param category_id:
+    :param chunk_size: rows per fetch and per written chunk
+    :return: NDJSON chunks
+    """
+    stmt = (
+        select(Posts.id, Posts.title, Posts.content, Posts.author_id, Posts.category_id, Posts.view_count)
+        .where(Posts.category_id == category_id)
+        .order_by(Posts.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    async with AsyncSessionFactory() as db_session:
+        result = await db_session.stream(stmt)
+        async for rows in result.partitions():
+            yield ndjson_chunk(row._asdict() for row in rows)
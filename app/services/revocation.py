@@ -0,0 +1,58 @@
+import asyncio
+from time import time
+
+from redis.asyncio import Redis
+
+# custom imports
+from app.utils.constants import AUTH_REVOKED_TOKENS_KEY
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+
+class RevokedTokens:
+    """
+    In-memory mirror of the sorted set of revoked token ids, scored by token expiry.
+
+    Revocations are broadcast on AUTH_TOKEN_ID_REVOCATION_CHANNEL, and the mirror is
+    reloaded from the set periodically and after a pub/sub reconnection, so checking a
+    token never leaves the process. Ids are dropped once their token has expired anyway.
+    """
+
+    def __init__(self) -> None:
+        self._expiries: dict[str, float] = {}
+        self._redis: Redis | None = None
+        self._sync_task: asyncio.Task | None = None
+
+    def __contains__(self, token_id: str) -> bool:
+        expires_at = self._expiries.get(token_id)
+        return expires_at is not None and expires_at > time()
+
+    def __len__(self) -> int:
+        return len(self._expiries)
+
+    def add(self, token_id: str, expires_at: float) -> None:
+        self._expiries[token_id] = expires_at
+
+    def handle(self, message: str) -> None:
+        token_id, expires_at = message.split(" ")
+        self.add(token_id, float(expires_at))
+
+    async def sync(self, redis: Redis) -> None:
+        self._redis = redis
+        now = time()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(AUTH_REVOKED_TOKENS_KEY, "-inf", now)
+            pipe.zrangebyscore(AUTH_REVOKED_TOKENS_KEY, now, "+inf", withscores=True)
+            _, revoked = await pipe.execute()
+        self._expiries = dict(revoked)
+        logger.log_debug(f"Revoked token ids synced | Count: {len(self._expiries)}")
+
+    def reset(self) -> None:
+        # called by the pub/sub listener after a reconnection, revocations may have been missed
+        if self._redis is not None:
+            self._sync_task = asyncio.get_running_loop().create_task(self.sync(self._redis))
+
+
+revoked_tokens = RevokedTokens()
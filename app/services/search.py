@@ -0,0 +1,43 @@
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# custom imports
+from app.models.posts import Posts
+from app.utils.constants import SEARCH_TEXT_CONFIG, SEARCH_HEADLINE_OPTIONS
+
+
+async def search_posts(db_session: AsyncSession, q: str, limit: int, after: tuple[float, int] | None = None):
+    """
+    Full-text search over the title and content of the posts, most relevant first.
+
+    Matching goes through the GIN index on `Posts.search_vector`. Pages are keyed by
+    (rank, id) of the last hit, and snippets are only built for the hits of the page.
+
+    :param db_session:
+    :param q: web search style query, e.g. `board -server "keyset pagination"`
+    :param limit: maximum number of hits to return
+    :param after: (rank, id) of the last hit of the previous page
+    :return: list of rows with id, title, author_id, category_id, rank and snippet
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_TEXT_CONFIG, q)
+    rank = func.ts_rank_cd(Posts.search_vector, tsquery)
+
+    hits = select(Posts.id, rank.label("rank")).where(Posts.search_vector.bool_op("@@")(tsquery))
+    if after is not None:
+        hits = hits.where(tuple_(rank, Posts.id) < tuple_(*after))
+    hits = hits.order_by(rank.desc(), Posts.id.desc()).limit(limit).subquery()
+
+    stmt = (
+        select(
+            Posts.id,
+            Posts.title,
+            Posts.author_id,
+            Posts.category_id,
+            hits.c.rank,
+            func.ts_headline(SEARCH_TEXT_CONFIG, Posts.content, tsquery, SEARCH_HEADLINE_OPTIONS).label("snippet"),
+        )
+        .join(hits, hits.c.id == Posts.id)
+        .order_by(hits.c.rank.desc(), Posts.id.desc())
+    )
+    result = await db_session.execute(stmt)
+    return result.all()
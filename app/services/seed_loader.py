@@ -0,0 +1,218 @@
+"""
+Bulk-load the seed data of `db/` with COPY.
+
+Reads the `<schema>_<table>.sql` INSERT dumps (or `<schema>_<table>.csv` files with a
+header line) and loads them in foreign key order. Tables that do not depend on each
+other are loaded in parallel, each on its own connection.
+
+    python -m app.services.seed_loader --dir db --truncate
+"""
+import argparse
+import asyncio
+import csv
+import re
+from collections.abc import Iterator
+from decimal import Decimal
+from pathlib import Path
+from time import perf_counter
+
+from sqlalchemy import Integer, Table
+
+# custom imports
+import app.models  # noqa: F401 register every table on the metadata
+from app.database import engine
+from app.models.base import Base
+from app.utils.constants import SEED_COPY_CHUNK_SIZE
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+SEED_DATA_DIR = Path(__file__).resolve().parents[2] / "db"
+
+_INSERT_HEADER = re.compile(r"insert\s+into\s+([\w.\"]+)\s*\(([^)]*)\)\s*values", re.IGNORECASE)
+_ROW_START = re.compile(r"\s*\(")
+_VALUE = re.compile(
+    r"\s*(?:'((?:[^']|'')*)'|(null)|(true|false)|(-?\d+\.\d+)|(-?\d+))\s*([,)])",
+    re.IGNORECASE,
+)
+_ROW_SEPARATOR = re.compile(r"\s*([,;]?)")
+
+
+def _quoted(table: Table) -> str:
+    return f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+
+
+def _convert(value: re.Match):
+    text, null, boolean, decimal, integer = value.group(1, 2, 3, 4, 5)
+    if text is not None:
+        return text.replace("''", "'")
+    if null is not None:
+        return None
+    if boolean is not None:
+        return boolean.lower() == "true"
+    if decimal is not None:
+        return Decimal(decimal)
+    return int(integer)
+
+
+def parse_sql_inserts(text: str) -> Iterator[tuple[str, list[str], list[tuple]]]:
+    """
+    Parse multi-row `INSERT INTO ... VALUES (...), (...);` statements.
+
+    :param text: SQL dump
+    :return: (table name, columns, rows) per statement
+    """
+    pos = 0
+    while header := _INSERT_HEADER.search(text, pos):
+        columns = [column.strip().strip('"') for column in header.group(2).split(",")]
+        rows, pos = [], header.end()
+        while True:
+            row_start = _ROW_START.match(text, pos)
+            if row_start is None:
+                raise ValueError(f"Expected a row at offset {pos}")
+            pos, row = row_start.end(), []
+            while True:
+                value = _VALUE.match(text, pos)
+                if value is None:
+                    raise ValueError(f"Cannot parse the value at offset {pos}")
+                row.append(_convert(value))
+                pos = value.end()
+                if value.group(6) == ")":
+                    break
+            rows.append(tuple(row))
+            separator = _ROW_SEPARATOR.match(text, pos)
+            pos = separator.end()
+            if separator.group(1) != ",":
+                break
+        yield header.group(1).replace('"', ""), columns, rows
+
+
+def find_seed_files(directory: Path) -> dict[Table, Path]:
+    """Match the `<schema>_<table>.sql|csv` files of `directory` with the tables of the metadata."""
+    seed_files = {}
+    for path in sorted(directory.iterdir()):
+        if path.suffix not in (".sql", ".csv") or "_" not in path.stem:
+            continue
+        schema, name = path.stem.split("_", 1)
+        table = Base.metadata.tables.get(f"{schema}.{name}")
+        if table is None:
+            logger.log_warning(f"Seed file {path.name} matches no table, skipped")
+            continue
+        # prefer the csv when both exist, COPY reads it as is
+        if table not in seed_files or path.suffix == ".csv":
+            seed_files[table] = path
+    return seed_files
+
+
+def dependency_levels(tables: list[Table]) -> list[list[Table]]:
+    """Group `tables` so that each one only references tables of the previous groups."""
+    levels = {}
+
+    def level(table: Table) -> int:
+        if table not in levels:
+            referred = {fk.referred_table for fk in table.foreign_key_constraints} & set(tables) - {table}
+            levels[table] = 1 + max((level(parent) for parent in referred), default=-1)
+        return levels[table]
+
+    grouped = [[] for _ in range(max(map(level, tables), default=-1) + 1)]
+    for table in tables:
+        grouped[levels[table]].append(table)
+    return grouped
+
+
+async def _copy_sql(driver_conn, table: Table, path: Path, chunk_size: int) -> int:
+    text = await asyncio.to_thread(path.read_text, "utf-8")
+    statements = await asyncio.to_thread(lambda: list(parse_sql_inserts(text)))
+    total = sum(len(rows) for _, _, rows in statements)
+    loaded, start_time = 0, perf_counter()
+    for _, columns, rows in statements:
+        for offset in range(0, len(rows), chunk_size):
+            chunk = rows[offset:offset + chunk_size]
+            await driver_conn.copy_records_to_table(
+                table.name, schema_name=table.schema, columns=columns, records=chunk
+            )
+            loaded += len(chunk)
+            elapsed = perf_counter() - start_time
+            logger.log_info(
+                f"Seeding {table.fullname} | Rows: {loaded}/{total}"
+                f" | {loaded / elapsed if elapsed else 0:.0f} rows/s"
+            )
+    return loaded
+
+
+async def _copy_csv(driver_conn, table: Table, path: Path) -> int:
+    with path.open(newline="", encoding="utf-8") as file:
+        columns = next(csv.reader(file))
+    status = await driver_conn.copy_to_table(
+        table.name, schema_name=table.schema, source=path, columns=columns, format="csv", header=True
+    )
+    # the command tag is "COPY <rows>"
+    return int(status.split()[-1])
+
+
+async def _load_table(table: Table, path: Path, chunk_size: int) -> dict:
+    start_time = perf_counter()
+    async with engine.connect() as conn:
+        raw_conn = await conn.get_raw_connection()
+        driver_conn = raw_conn.driver_connection
+        async with driver_conn.transaction():
+            if path.suffix == ".csv":
+                rows = await _copy_csv(driver_conn, table, path)
+            else:
+                rows = await _copy_sql(driver_conn, table, path, chunk_size)
+            # ids were copied explicitly, move the serial sequences past them
+            columns = list(table.primary_key.columns)
+            if len(columns) == 1 and isinstance(columns[0].type, Integer):
+                await driver_conn.execute(
+                    f'SELECT setval(pg_get_serial_sequence($1, $2), max("{columns[0].name}")) FROM {_quoted(table)}',
+                    _quoted(table),
+                    columns[0].name,
+                )
+    elapsed = perf_counter() - start_time
+    logger.log_info(f"Seeded {table.fullname} | Rows: {rows} | Time: {elapsed} seconds")
+    return {"rows": rows, "seconds": elapsed, "rows_per_second": rows / elapsed if elapsed else 0.0}
+
+
+async def load_seed_data(
+    directory: Path = SEED_DATA_DIR, truncate: bool = False, chunk_size: int = SEED_COPY_CHUNK_SIZE
+) -> dict[str, dict]:
+    """
+    Load the seed files of `directory` into their tables, see the module docstring.
+
+    :param directory: directory of the seed files
+    :param truncate: empty the seeded tables first
+    :param chunk_size: rows per COPY of the SQL dumps
+    :return: rows, seconds and rows_per_second per table
+    """
+    seed_files = find_seed_files(Path(directory))
+    if truncate and seed_files:
+        async with engine.connect() as conn:
+            raw_conn = await conn.get_raw_connection()
+            await raw_conn.driver_connection.execute(
+                f"TRUNCATE {', '.join(_quoted(table) for table in seed_files)} CASCADE"
+            )
+
+    report = {}
+    for tables in dependency_levels(list(seed_files)):
+        results = await asyncio.gather(*(_load_table(table, seed_files[table], chunk_size) for table in tables))
+        report.update((table.fullname, result) for table, result in zip(tables, results))
+    return report
+
+
+async def main(args):
+    start_time = perf_counter()
+    report = await load_seed_data(Path(args.dir), truncate=args.truncate, chunk_size=args.chunk_size)
+    await engine.dispose()
+    print(f"{'table':<30} {'rows':>10} {'seconds':>10} {'rows/s':>12}")
+    for name, result in report.items():
+        print(f"{name:<30} {result['rows']:>10} {result['seconds']:>10.2f} {result['rows_per_second']:>12.0f}")
+    print(f"loaded {sum(result['rows'] for result in report.values())} rows in {perf_counter() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=str(SEED_DATA_DIR), help="directory of the seed files")
+    parser.add_argument("--truncate", action="store_true", help="empty the seeded tables first")
+    parser.add_argument("--chunk-size", type=int, default=SEED_COPY_CHUNK_SIZE, help="rows per COPY")
+    asyncio.run(main(parser.parse_args()))
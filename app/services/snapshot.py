@@ -0,0 +1,383 @@
+"""
+Read-only columnar snapshot of the Shakespeare corpus, memory-mapped by every worker.
+
+The file holds each column of the works, chapters, characters, paragraphs and
+wordforms as a flat array, and all the strings in one UTF-8 heap addressed by
+offset arrays. Workers map it read-only: numbers are read in place, pages are
+shared between processes by the OS page cache, and no database connection is used.
+
+    python -m app.services.snapshot --path /tmp/shakespeare.snapshot
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from pathlib import Path
+from time import perf_counter
+
+from sqlalchemy import select
+
+# custom imports
+from app.config import settings
+from app.database import engine, AsyncSessionFactory
+from app.models.shakespeare import Chapter, Character, Paragraph, Wordform, Work
+from app.utils.constants import SHAKESPEARE_SNAPSHOT_MAGIC
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+# column kinds: 32-bit signed integer, string, string or null
+INT, STR, NULLABLE_STR = "int", "str", "str?"
+
+SNAPSHOT_SCHEMA = {
+    "work": (
+        Work,
+        [Work.id],
+        {
+            "id": STR,
+            "title": STR,
+            "long_title": STR,
+            "year": INT,
+            "genre_type": STR,
+            "source": STR,
+            "total_words": INT,
+            "total_paragraphs": INT,
+            "notes": NULLABLE_STR,
+        },
+    ),
+    "chapter": (
+        Chapter,
+        [Chapter.work_id, Chapter.section_number, Chapter.chapter_number],
+        {"id": INT, "work_id": STR, "section_number": INT, "chapter_number": INT, "description": STR},
+    ),
+    "character": (
+        Character,
+        [Character.id],
+        {"id": STR, "name": STR, "abbrev": NULLABLE_STR, "description": NULLABLE_STR, "speech_count": INT},
+    ),
+    # grouped by character and ordered like the keyset pagination, see `Snapshot.character_paragraphs`
+    "paragraph": (
+        Paragraph,
+        [Paragraph.character_id, Paragraph.work_id, Paragraph.paragraph_num],
+        {
+            "id": INT,
+            "work_id": STR,
+            "paragraph_num": INT,
+            "character_id": STR,
+            "plain_text": STR,
+            "phonetic_text": STR,
+            "stem_text": STR,
+            "paragraph_type": STR,
+            "section_number": INT,
+            "chapter_number": INT,
+            "char_count": INT,
+            "word_count": INT,
+        },
+    ),
+    "wordform": (
+        Wordform,
+        [Wordform.id],
+        {"id": INT, "plain_text": STR, "phonetic_text": STR, "stem_text": STR, "occurences": INT},
+    ),
+}
+
+# columns derived at build time: row numbers of the related rows, paragraph range of each character
+DERIVED_COLUMNS = {
+    "paragraph": {"work_row": INT, "chapter_row": INT, "character_row": INT},
+    "character": {"paragraph_start": INT, "paragraph_end": INT},
+}
+
+ParagraphProjectionRow = namedtuple(
+    "ParagraphProjectionRow",
+    [
+        "work_id",
+        "work_title",
+        "section_number",
+        "chapter_number",
+        "chapter_description",
+        "paragraph_num",
+        "character_id",
+        "character_name",
+        "plain_text",
+        "word_count",
+    ],
+)
+
+
+class _SnapshotWriter:
+    def __init__(self) -> None:
+        self.blocks: list[bytes] = []
+        self.size = 0
+        self.heap = bytearray()
+
+    def _block(self, data: bytes) -> tuple[int, int]:
+        # blocks are 8-byte aligned (relative to the data section, itself aligned), so that casts are valid
+        offset = self.size
+        padding = -len(data) % 8
+        self.blocks.append(data + b"\0" * padding)
+        self.size += len(data) + padding
+        return offset, len(data)
+
+    def column(self, kind: str, values: list) -> dict:
+        if kind == INT:
+            offset, length = self._block(array("i", values).tobytes())
+            return {"kind": kind, "offset": offset, "length": length}
+        offsets, nulls = array("Q", [len(self.heap)]), array("B")
+        for value in values:
+            nulls.append(value is None)
+            if value is not None:
+                self.heap += value.encode("utf-8")
+            offsets.append(len(self.heap))
+        spec = {"kind": kind}
+        spec["offset"], spec["length"] = self._block(offsets.tobytes())
+        if kind == NULLABLE_STR:
+            spec["nulls_offset"], spec["nulls_length"] = self._block(nulls.tobytes())
+        return spec
+
+    def write(self, path: Path, tables: dict) -> int:
+        heap_offset, heap_length = self._block(bytes(self.heap))
+        directory = json.dumps(
+            {"byteorder": sys.byteorder, "heap": [heap_offset, heap_length], "tables": tables}
+        ).encode("utf-8")
+        header = SHAKESPEARE_SNAPSHOT_MAGIC + struct.pack("<Q", len(directory)) + directory
+        header += b"\0" * (-len(header) % 8)
+
+        # write then rename: workers holding the old file keep their mapping
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as file:
+            file.write(header)
+            for block in self.blocks:
+                file.write(block)
+        os.replace(tmp_path, path)
+        return len(header) + self.size
+
+
+def write_snapshot(path: Path, columns: dict[str, dict[str, list]]) -> int:
+    """
+    Write the columns of every table of `SNAPSHOT_SCHEMA`, ordered as its order_by, adding the derived ones.
+
+    :return: size of the file in bytes
+    """
+    work_rows = {work_id: i for i, work_id in enumerate(columns["work"]["id"])}
+    character_rows = {character_id: i for i, character_id in enumerate(columns["character"]["id"])}
+    chapter = columns["chapter"]
+    chapter_rows = {
+        key: i for i, key in enumerate(zip(chapter["work_id"], chapter["section_number"], chapter["chapter_number"]))
+    }
+    # sort in python rather than trusting the database collation, the reader bisects with python comparisons
+    paragraph = columns["paragraph"]
+    order = sorted(
+        range(len(paragraph["id"])),
+        key=lambda i: (paragraph["character_id"][i], paragraph["work_id"][i], paragraph["paragraph_num"][i]),
+    )
+    paragraph = columns["paragraph"] = {column: [values[i] for i in order] for column, values in paragraph.items()}
+    paragraph["work_row"] = [work_rows[work_id] for work_id in paragraph["work_id"]]
+    paragraph["character_row"] = [character_rows[character_id] for character_id in paragraph["character_id"]]
+    paragraph["chapter_row"] = [
+        chapter_rows[key]
+        for key in zip(paragraph["work_id"], paragraph["section_number"], paragraph["chapter_number"])
+    ]
+    starts = [0] * len(character_rows)
+    ends = [0] * len(character_rows)
+    for i, row in enumerate(paragraph["character_row"]):
+        if ends[row] == 0:
+            starts[row] = i
+        ends[row] = i + 1
+    columns["character"]["paragraph_start"], columns["character"]["paragraph_end"] = starts, ends
+
+    writer = _SnapshotWriter()
+    tables = {}
+    for name, (_, _, schema) in SNAPSHOT_SCHEMA.items():
+        kinds = {**schema, **DERIVED_COLUMNS.get(name, {})}
+        tables[name] = {
+            "rows": len(columns[name]["id"]),
+            "columns": {column: writer.column(kind, columns[name][column]) for column, kind in kinds.items()},
+        }
+    return writer.write(path, tables)
+
+
+async def build_snapshot(path: str | Path) -> int:
+    """
+    Export the corpus from the database into a snapshot file.
+
+    :return: size of the file in bytes
+    """
+    start_time = perf_counter()
+    columns = {}
+    async with AsyncSessionFactory() as db_session:
+        for name, (model, order_by, schema) in SNAPSHOT_SCHEMA.items():
+            result = await db_session.execute(
+                select(*(getattr(model, column) for column in schema)).order_by(*order_by)
+            )
+            rows = result.all()
+            columns[name] = {column: [row[i] for row in rows] for i, column in enumerate(schema)}
+
+    size = await asyncio.to_thread(write_snapshot, Path(path), columns)
+    logger.log_info(f"Shakespeare snapshot built | Size: {size} bytes | Time: {perf_counter() - start_time} seconds")
+    return size
+
+
+class SnapshotTable:
+    """Columns of one table of the snapshot, read in place from the mapping."""
+
+    def __init__(self, data: memoryview, heap: memoryview, spec: dict) -> None:
+        self.rows = spec["rows"]
+        self.heap = heap
+        self.ints, self.strs, self.nulls = {}, {}, {}
+        for name, column in spec["columns"].items():
+            block = data[column["offset"]:column["offset"] + column["length"]]
+            if column["kind"] == INT:
+                self.ints[name] = block.cast("i")
+            else:
+                self.strs[name] = block.cast("Q")
+                if column["kind"] == NULLABLE_STR:
+                    self.nulls[name] = data[column["nulls_offset"]:column["nulls_offset"] + column["nulls_length"]]
+
+    def get(self, name: str, row: int):
+        ints = self.ints.get(name)
+        if ints is not None:
+            return ints[row]
+        nulls = self.nulls.get(name)
+        if nulls is not None and nulls[row]:
+            return None
+        offsets = self.strs[name]
+        # the only copy: building the str out of the heap bytes
+        return str(self.heap[offsets[row]:offsets[row + 1]], "utf-8")
+
+    def row(self, row: int) -> dict:
+        return {name: self.get(name, row) for name in (*self.ints, *self.strs)}
+
+
+class Snapshot:
+    """Memory-mapped snapshot, see the module docstring."""
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as file:
+            # the mapping outlives the file descriptor
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(SHAKESPEARE_SNAPSHOT_MAGIC)] != SHAKESPEARE_SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a Shakespeare snapshot")
+        start = len(SHAKESPEARE_SNAPSHOT_MAGIC)
+        (directory_length,) = struct.unpack_from("<Q", self._mmap, start)
+        start += 8
+        directory = json.loads(self._mmap[start:start + directory_length])
+        if directory["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was built on a {directory['byteorder']} endian machine")
+        start += directory_length
+        data = memoryview(self._mmap)[start + (-start % 8):]
+        heap_offset, heap_length = directory["heap"]
+        heap = data[heap_offset:heap_offset + heap_length]
+        self.tables = {name: SnapshotTable(data, heap, spec) for name, spec in directory["tables"].items()}
+        self.size = len(self._mmap)
+
+        character = self.tables["character"]
+        self._character_rows: dict[str, list[int]] = {}
+        for row in range(character.rows):
+            self._character_rows.setdefault(character.get("name", row), []).append(row)
+
+    def _paragraph_rows(self, character_name: str):
+        character = self.tables["character"]
+        paragraph = self.tables["paragraph"]
+        ranges = [
+            range(character.get("paragraph_start", row), character.get("paragraph_end", row))
+            for row in self._character_rows.get(character_name, ())
+        ]
+        # a name can belong to several characters, each range is sorted by (work_id, paragraph_num)
+        key = lambda row: (paragraph.get("work_id", row), paragraph.get("paragraph_num", row))  # noqa: E731
+        return ranges, key
+
+    def character_paragraphs(self, character_name: str) -> list[dict]:
+        """Paragraphs of a character with their character, chapter and work, like `Paragraph.find`."""
+        paragraph = self.tables["paragraph"]
+        work, chapter, character = self.tables["work"], self.tables["chapter"], self.tables["character"]
+        ranges, _ = self._paragraph_rows(character_name)
+        items = []
+        for rows in ranges:
+            for row in rows:
+                item = paragraph.row(row)
+                item["work"] = work.row(item.pop("work_row"))
+                item["chapter"] = chapter.row(item.pop("chapter_row"))
+                item["character"] = character.row(item.pop("character_row"))
+                del item["character"]["paragraph_start"], item["character"]["paragraph_end"]
+                items.append(item)
+        return items
+
+    def paragraph_projection(
+        self, character_name: str, limit: int, after: tuple[str, int] | None = None
+    ) -> list[ParagraphProjectionRow]:
+        """One page of the paragraphs of a character, like `Paragraph.find_projection`."""
+        paragraph = self.tables["paragraph"]
+        work, chapter, character = self.tables["work"], self.tables["chapter"], self.tables["character"]
+        ranges, key = self._paragraph_rows(character_name)
+        if after is not None:
+            after = tuple(after)
+            ranges = [rows[bisect_right(rows, after, key=key):] for rows in ranges]
+        merged = heapq.merge(*ranges, key=key) if len(ranges) > 1 else (ranges[0] if ranges else ())
+        page = []
+        for row in merged:
+            if len(page) == limit:
+                break
+            chapter_row = paragraph.get("chapter_row", row)
+            page.append(
+                ParagraphProjectionRow(
+                    work_id=paragraph.get("work_id", row),
+                    work_title=work.get("title", paragraph.get("work_row", row)),
+                    section_number=paragraph.get("section_number", row),
+                    chapter_number=paragraph.get("chapter_number", row),
+                    chapter_description=chapter.get("description", chapter_row),
+                    paragraph_num=paragraph.get("paragraph_num", row),
+                    character_id=paragraph.get("character_id", row),
+                    character_name=character.get("name", paragraph.get("character_row", row)),
+                    plain_text=paragraph.get("plain_text", row),
+                    word_count=paragraph.get("word_count", row),
+                )
+            )
+        return page
+
+    def wordform_rows(self):
+        """(plain_text, phonetic_text, stem_text, occurences) of every wordform."""
+        wordform = self.tables["wordform"]
+        for row in range(wordform.rows):
+            yield (
+                wordform.get("plain_text", row),
+                wordform.get("phonetic_text", row),
+                wordform.get("stem_text", row),
+                wordform.get("occurences", row),
+            )
+
+
+async def load_snapshot(path: str | None = settings.shakespeare_snapshot_path) -> Snapshot | None:
+    """Map the snapshot at `path`, building it first if it does not exist. None when no path is configured."""
+    if not path:
+        return None
+    if not Path(path).is_file():
+        await build_snapshot(path)
+    snapshot = Snapshot(path)
+    logger.log_info(f"Shakespeare snapshot mapped | Path: {path} | Size: {snapshot.size} bytes")
+    return snapshot
+
+
+async def main(args):
+    size = await build_snapshot(args.path)
+    await engine.dispose()
+    print(f"wrote {size} bytes to {args.path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--path",
+        default=settings.shakespeare_snapshot_path,
+        required=not settings.shakespeare_snapshot_path,
+        help="snapshot file, SHAKESPEARE_SNAPSHOT_PATH by default",
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,68 @@
+import json
+from itertools import groupby
+from time import perf_counter
+
+from sqlalchemy import select
+
+# custom imports
+from app.database import AsyncSessionFactory
+from app.models.shakespeare import Chapter, Work
+from app.services.snapshot import Snapshot
+from app.utils.etag import make_etag
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+WORK_COLUMNS = ("id", "title", "long_title", "year", "genre_type", "source", "total_words", "total_paragraphs", "notes")
+CHAPTER_COLUMNS = ("id", "work_id", "section_number", "chapter_number", "description")
+
+
+class CachedToc:
+    """Serialized table of contents of a work with its ETag, ready to be sent."""
+
+    __slots__ = ("payload", "etag")
+
+    def __init__(self, work: dict, chapters: list[dict]) -> None:
+        sections = [
+            {
+                "section_number": section_number,
+                "chapters": [
+                    {
+                        "id": chapter["id"],
+                        "chapter_number": chapter["chapter_number"],
+                        "description": chapter["description"],
+                    }
+                    for chapter in section_chapters
+                ],
+            }
+            for section_number, section_chapters in groupby(chapters, key=lambda chapter: chapter["section_number"])
+        ]
+        self.payload = json.dumps({"work": work, "sections": sections}, separators=(",", ":")).encode("utf-8")
+        self.etag = make_etag(self.payload)
+
+
+async def load_work_tocs(snapshot: Snapshot | None = None) -> dict[str, CachedToc]:
+    """Precompute the table of contents of every work, from the snapshot when there is one."""
+    start_time = perf_counter()
+    if snapshot is not None:
+        work_table, chapter_table = snapshot.tables["work"], snapshot.tables["chapter"]
+        works = [{column: work_table.get(column, row) for column in WORK_COLUMNS} for row in range(work_table.rows)]
+        chapters = [
+            {column: chapter_table.get(column, row) for column in CHAPTER_COLUMNS} for row in range(chapter_table.rows)
+        ]
+    else:
+        async with AsyncSessionFactory() as db_session:
+            result = await db_session.execute(select(*(getattr(Work, column) for column in WORK_COLUMNS)))
+            works = [row._asdict() for row in result]
+            result = await db_session.execute(select(*(getattr(Chapter, column) for column in CHAPTER_COLUMNS)))
+            chapters = [row._asdict() for row in result]
+
+    chapters.sort(key=lambda chapter: (chapter["work_id"], chapter["section_number"], chapter["chapter_number"]))
+    chapters_by_work = {
+        work_id: list(work_chapters)
+        for work_id, work_chapters in groupby(chapters, key=lambda chapter: chapter["work_id"])
+    }
+    tocs = {work["id"]: CachedToc(work, chapters_by_work.get(work["id"], [])) for work in works}
+    logger.log_info(f"Work tocs built | Works: {len(tocs)} | Time: {perf_counter() - start_time} seconds")
+    return tocs
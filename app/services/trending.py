@@ -0,0 +1,102 @@
+from time import time
+
+from redis.asyncio import Redis
+
+# custom imports
+from app.redis import get_script
+from app.utils.constants import (
+    TRENDING_KEY_PREFIX,
+    TRENDING_HALF_LIFE,
+    TRENDING_MAX_SIZE,
+    TRENDING_MIN_SCORE,
+)
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+TRENDING_ALL_KEY = f"{TRENDING_KEY_PREFIX}all"
+TRENDING_EPOCH_KEY = f"{TRENDING_KEY_PREFIX}epoch"
+# every per-category sorted set, walked by the rebase
+TRENDING_KEYS_KEY = f"{TRENDING_KEY_PREFIX}keys"
+
+# Scores decay exponentially with TRENDING_HALF_LIFE. Instead of decaying every score,
+# new events weigh 2 ^ ((now - epoch) / half_life) times more, which keeps every update
+# a single ZINCRBY. The rebase moves the epoch forward from time to time and scales the
+# sets down accordingly, so that the scores never overflow.
+_BUMP_SCRIPT = """
+local epoch = tonumber(redis.call('GET', KEYS[3]))
+if not epoch then
+    epoch = tonumber(ARGV[3])
+    redis.call('SET', KEYS[3], ARGV[3])
+end
+local increment = tonumber(ARGV[2]) * math.pow(2, (tonumber(ARGV[3]) - epoch) / tonumber(ARGV[4]))
+local max_size = tonumber(ARGV[5])
+for i = 1, 2 do
+    redis.call('ZINCRBY', KEYS[i], increment, ARGV[1])
+    if redis.call('ZCARD', KEYS[i]) > max_size then
+        redis.call('ZREMRANGEBYRANK', KEYS[i], 0, -(max_size + 1))
+    end
+end
+redis.call('SADD', KEYS[4], KEYS[2])
+return 1
+"""
+
+# the category sets are only known at runtime, so this script is not cluster safe
+_REBASE_SCRIPT = """
+local epoch = tonumber(redis.call('GET', KEYS[1]))
+if not epoch then
+    return 0
+end
+local factor = math.pow(2, (epoch - tonumber(ARGV[1])) / tonumber(ARGV[2]))
+local keys = redis.call('SMEMBERS', KEYS[2])
+table.insert(keys, KEYS[3])
+for _, key in ipairs(keys) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('ZUNIONSTORE', key, 1, key, 'WEIGHTS', factor)
+        redis.call('ZREMRANGEBYSCORE', key, '-inf', '(' .. ARGV[3])
+    else
+        redis.call('SREM', KEYS[2], key)
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1])
+return #keys
+"""
+
+
+def trending_key(category_id: int | None) -> str:
+    return TRENDING_ALL_KEY if category_id is None else f"{TRENDING_KEY_PREFIX}category:{category_id}"
+
+
+async def bump_trending_post(redis: Redis, post_id: int, category_id: int, weight: float) -> None:
+    """Add an event (view, edit, creation) of `weight` to the trending score of a post."""
+    keys = [TRENDING_ALL_KEY, trending_key(category_id), TRENDING_EPOCH_KEY, TRENDING_KEYS_KEY]
+    args = [post_id, weight, time(), TRENDING_HALF_LIFE, TRENDING_MAX_SIZE]
+    await get_script(redis, _BUMP_SCRIPT)(keys=keys, args=args, client=redis)
+
+
+async def remove_trending_post(redis: Redis, post_id: int, category_id: int) -> None:
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.zrem(TRENDING_ALL_KEY, post_id)
+        pipe.zrem(trending_key(category_id), post_id)
+        await pipe.execute()
+
+
+async def get_trending_posts(redis: Redis, category_id: int | None, limit: int) -> list[tuple[int, float]]:
+    """
+    Return the hottest posts, overall or of a category.
+
+    :param redis:
+    :param category_id:
+    :param limit:
+    :return: list of (post_id, score), hottest first
+    """
+    _posts = await redis.zrevrange(trending_key(category_id), 0, limit - 1, withscores=True)
+    return [(int(post_id), score) for post_id, score in _posts]
+
+
+async def rebase_trending_scores(redis: Redis) -> None:
+    keys = [TRENDING_EPOCH_KEY, TRENDING_KEYS_KEY, TRENDING_ALL_KEY]
+    args = [time(), TRENDING_HALF_LIFE, TRENDING_MIN_SCORE]
+    rebased = await get_script(redis, _REBASE_SCRIPT)(keys=keys, args=args, client=redis)
+    logger.log_debug(f"Rebased {rebased} trending sets")
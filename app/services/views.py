@@ -0,0 +1,99 @@
+from time import time
+from uuid import uuid4
+
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+from sqlalchemy import Integer, func, literal, update
+from sqlalchemy.dialects.postgresql import ARRAY
+
+# custom imports
+from app.database import AsyncSessionFactory
+from app.models.posts import Posts
+from app.services.posts import invalidate_post_caches
+from app.utils.constants import POSTS_VIEWS_PENDING_KEY
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+
+class ViewFlushStats:
+    """Outcome of the view count flushes of this worker."""
+
+    __slots__ = ("flushes", "failures", "flushed_views", "last_flush_at", "last_flush_seconds", "last_flush_posts")
+
+    def __init__(self) -> None:
+        self.flushes = 0
+        self.failures = 0
+        self.flushed_views = 0
+        self.last_flush_at = None
+        self.last_flush_seconds = None
+        self.last_flush_posts = 0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+flush_stats = ViewFlushStats()
+
+
+async def count_post_view(redis: Redis, post_id: int) -> None:
+    await redis.hincrby(POSTS_VIEWS_PENDING_KEY, post_id, 1)
+
+
+async def get_pending_views(redis: Redis) -> int:
+    """Number of posts with views waiting for the next flush."""
+    return await redis.hlen(POSTS_VIEWS_PENDING_KEY)
+
+
+async def flush_post_views(redis: Redis) -> int:
+    """
+    Add the pending view counts to the posts table in a single UPDATE.
+
+    The pending hash is renamed first, so views counted during the flush go to a
+    fresh hash and concurrent flushes of other workers find nothing to do.
+
+    :param redis:
+    :return: number of posts updated
+    """
+    flushing_key = f"{POSTS_VIEWS_PENDING_KEY}:{uuid4().hex}"
+    try:
+        await redis.rename(POSTS_VIEWS_PENDING_KEY, flushing_key)
+    except ResponseError:
+        # no pending views
+        return 0
+
+    start_time = time()
+    pending = await redis.hgetall(flushing_key)
+    post_ids = [int(post_id) for post_id in pending]
+    deltas = [int(delta) for delta in pending.values()]
+    try:
+        views = func.unnest(
+            literal(post_ids, ARRAY(Integer)), literal(deltas, ARRAY(Integer))
+        ).table_valued("id", "delta").render_derived()
+        stmt = update(Posts).where(Posts.id == views.c.id).values(view_count=Posts.view_count + views.c.delta)
+        async with AsyncSessionFactory() as db_session:
+            await db_session.execute(stmt)
+            await db_session.commit()
+    except Exception:
+        flush_stats.failures += 1
+        # give the views back to the pending hash, the next flush retries them
+        async with redis.pipeline(transaction=True) as pipe:
+            for post_id, delta in zip(post_ids, deltas):
+                pipe.hincrby(POSTS_VIEWS_PENDING_KEY, post_id, delta)
+            pipe.delete(flushing_key)
+            await pipe.execute()
+        raise
+
+    # drop the cached posts so that readers see the new counts, bumping their generation
+    # keeps a loader that read the old counts from caching them again
+    await invalidate_post_caches(redis, post_ids)
+    await redis.delete(flushing_key)
+
+    flush_stats.flushes += 1
+    flush_stats.flushed_views += sum(deltas)
+    flush_stats.last_flush_at = time()
+    flush_stats.last_flush_seconds = flush_stats.last_flush_at - start_time
+    flush_stats.last_flush_posts = len(post_ids)
+    logger.log_debug(f"Flushed views of {len(post_ids)} posts | Time: {flush_stats.last_flush_seconds} seconds")
+    return len(post_ids)
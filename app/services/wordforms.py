@@ -0,0 +1,270 @@
+import heapq
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from time import perf_counter
+
+from sqlalchemy import select
+
+# custom imports
+from app.database import AsyncSessionFactory
+from app.models.shakespeare import Wordform
+from app.services.snapshot import Snapshot
+from app.utils.constants import (
+    WORDFORM_PRECOMPUTED_PREFIX_LENGTH,
+    WORDFORM_COMPLETE_MAX_LIMIT,
+)
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+
+class WordformIndex:
+    """
+    Read-only prefix index over the wordforms, sorted by plain text with their occurrence counts.
+
+    A prefix maps to a contiguous range of the sorted array, found by bisection. Short
+    prefixes match too many words to rank them per request, so their top completions
+    are precomputed.
+    """
+
+    def __init__(self, rows: Iterable[tuple[str, int]]) -> None:
+        start_time = perf_counter()
+        totals = {}
+        for plain_text, occurences in rows:
+            totals[plain_text] = totals.get(plain_text, 0) + occurences
+        self.words = sorted(totals)
+        self.counts = array("q", (totals[word] for word in self.words))
+
+        buckets = {}
+        for i, word in enumerate(self.words):
+            for length in range(min(len(word), WORDFORM_PRECOMPUTED_PREFIX_LENGTH) + 1):
+                buckets.setdefault(word[:length], []).append(i)
+        self._top = {
+            prefix: array("l", heapq.nlargest(WORDFORM_COMPLETE_MAX_LIMIT, indexes, key=self.counts.__getitem__))
+            for prefix, indexes in buckets.items()
+        }
+        self.build_seconds = perf_counter() - start_time
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def complete(self, prefix: str, limit: int) -> list[tuple[str, int]]:
+        """
+        Most frequent wordforms starting with `prefix`.
+
+        :param prefix:
+        :param limit: at most WORDFORM_COMPLETE_MAX_LIMIT
+        :return: list of (plain_text, occurences), most frequent first
+        """
+        prefix = prefix.lower()
+        if len(prefix) <= WORDFORM_PRECOMPUTED_PREFIX_LENGTH:
+            indexes = self._top.get(prefix, ())[:limit]
+        else:
+            lo = bisect_left(self.words, prefix)
+            hi = bisect_left(self.words, prefix + "\U0010ffff", lo)
+            indexes = heapq.nlargest(limit, range(lo, hi), key=self.counts.__getitem__)
+        return [(self.words[i], self.counts[i]) for i in indexes]
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the index."""
+        size = sys.getsizeof(self.words) + sum(sys.getsizeof(word) for word in self.words)
+        size += sys.getsizeof(self.counts) + sys.getsizeof(self._top)
+        size += sum(sys.getsizeof(prefix) + sys.getsizeof(top) for prefix, top in self._top.items())
+        return size
+
+    def stats(self) -> dict:
+        return {
+            "wordforms": len(self.words),
+            "precomputed_prefixes": len(self._top),
+            "build_seconds": self.build_seconds,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+def edit_pattern(word: str) -> tuple[dict[str, int], int]:
+    """Precompute the character bitmasks of `word` for `edit_distance`."""
+    masks = {}
+    for i, char in enumerate(word):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks, len(word)
+
+
+def edit_distance(pattern: tuple[dict[str, int], int], other: str) -> int:
+    """
+    Levenshtein distance between the word of `pattern` and `other`.
+
+    Bit-parallel algorithm of Myers (in the formulation of Hyyro): a column of the
+    dynamic programming matrix is a pair of bit vectors, so each character of `other`
+    costs a handful of integer operations instead of a loop over the word.
+    """
+    masks, length = pattern
+    if not length:
+        return len(other)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    pv, mv, score = full, 0, length
+    for char in other:
+        eq = masks.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return score
+
+
+class BKTree:
+    """Burkhard-Keller tree: a metric tree over words for edit distance queries."""
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self.words: list[str] = []
+        self.children: list[dict[int, int]] = []
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        if not self.words:
+            self.words.append(word)
+            self.children.append({})
+            return
+        pattern = edit_pattern(word)
+        node = 0
+        while True:
+            distance = edit_distance(pattern, self.words[node])
+            if distance == 0:
+                return
+            child = self.children[node].get(distance)
+            if child is None:
+                self.children[node][distance] = len(self.words)
+                self.words.append(word)
+                self.children.append({})
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> list[tuple[str, int]]:
+        """All the words within `max_distance` edits of `word`, in no particular order."""
+        if not self.words:
+            return []
+        pattern = edit_pattern(word)
+        found, stack = [], [0]
+        while stack:
+            node = stack.pop()
+            distance = edit_distance(pattern, self.words[node])
+            if distance <= max_distance:
+                found.append((self.words[node], distance))
+            # by the triangle inequality, only these subtrees can hold matches
+            for child_distance, child in self.children[node].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return found
+
+
+class WordformLookup:
+    """
+    Hash indexes of the wordforms by phonetic code and by stem, plus a BK-tree for typos.
+
+    Every bucket is sorted by occurrences once at build time, so "sounds like" and
+    "inflections of" are a dict lookup. Words one edit away are found by enumerating
+    the edits of the query (a few hundred dict lookups), the BK-tree is only walked for
+    larger distances, which cost tens of milliseconds of CPU.
+    """
+
+    def __init__(self, rows: Iterable[tuple[str, str, str, int]]) -> None:
+        start_time = perf_counter()
+        self.occurences: dict[str, int] = {}
+        self.codes: dict[str, tuple[str, str]] = {}
+        by_phonetic, by_stem = {}, {}
+        for plain_text, phonetic_text, stem_text, occurences in rows:
+            self.occurences[plain_text] = self.occurences.get(plain_text, 0) + occurences
+            self.codes[plain_text] = (phonetic_text, stem_text)
+            by_phonetic.setdefault(phonetic_text, set()).add(plain_text)
+            by_stem.setdefault(stem_text, set()).add(plain_text)
+        self.by_phonetic = {code: self._ranked(words) for code, words in by_phonetic.items()}
+        self.by_stem = {stem: self._ranked(words) for stem, words in by_stem.items()}
+        self.alphabet = sorted(set("".join(self.occurences)))
+        # insert frequent words first, they end up near the root
+        self.tree = BKTree(self._ranked(self.occurences))
+        self.build_seconds = perf_counter() - start_time
+
+    def _ranked(self, words: Iterable[str]) -> tuple[str, ...]:
+        return tuple(sorted(words, key=lambda word: (-self.occurences[word], word)))
+
+    def _neighbors(self, word: str) -> list[tuple[str, int]]:
+        # every deletion, substitution and insertion of `word` over the alphabet of the wordforms
+        splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+        edits = {head + tail[1:] for head, tail in splits if tail}
+        edits.update(head + char + tail[1:] for head, tail in splits if tail for char in self.alphabet)
+        edits.update(head + char + tail for head, tail in splits for char in self.alphabet)
+        edits.add(word)
+        return [(edit, 0 if edit == word else 1) for edit in edits if edit in self.codes]
+
+    def _resolve(self, word: str) -> str | None:
+        # unknown words are replaced with their closest known spelling, one edit away at most
+        word = word.lower()
+        if word in self.codes:
+            return word
+        matches = self.fuzzy(word, 1, 1)
+        return matches[0][0] if matches else None
+
+    def sounds_like(self, word: str, limit: int) -> list[tuple[str, int]]:
+        resolved = self._resolve(word)
+        if resolved is None:
+            return []
+        return [(w, self.occurences[w]) for w in self.by_phonetic[self.codes[resolved][0]][:limit]]
+
+    def inflections(self, word: str, limit: int) -> list[tuple[str, int]]:
+        resolved = self._resolve(word)
+        if resolved is None:
+            return []
+        return [(w, self.occurences[w]) for w in self.by_stem[self.codes[resolved][1]][:limit]]
+
+    def fuzzy(self, word: str, max_distance: int, limit: int) -> list[tuple[str, int, int]]:
+        """
+        Known words within `max_distance` edits of `word`.
+
+        :return: list of (plain_text, occurences, distance), closest and most frequent first
+        """
+        word = word.lower()
+        if max_distance <= 1:
+            matches = [match for match in self._neighbors(word) if match[1] <= max_distance]
+        else:
+            matches = self.tree.search(word, max_distance)
+        matches.sort(key=lambda match: (match[1], -self.occurences[match[0]], match[0]))
+        return [(w, self.occurences[w], distance) for w, distance in matches[:limit]]
+
+    def stats(self) -> dict:
+        return {
+            "wordforms": len(self.codes),
+            "phonetic_codes": len(self.by_phonetic),
+            "stems": len(self.by_stem),
+            "build_seconds": self.build_seconds,
+        }
+
+
+async def load_wordforms(snapshot: Snapshot | None = None) -> tuple[WordformIndex, WordformLookup]:
+    if snapshot is not None:
+        rows = list(snapshot.wordform_rows())
+    else:
+        async with AsyncSessionFactory() as db_session:
+            result = await db_session.execute(
+                select(Wordform.plain_text, Wordform.phonetic_text, Wordform.stem_text, Wordform.occurences)
+            )
+            rows = result.tuples().all()
+    _index = WordformIndex((plain_text, occurences) for plain_text, _, _, occurences in rows)
+    logger.log_info(
+        f"Wordform index built | Wordforms: {len(_index)} | Time: {_index.build_seconds} seconds"
+        f" | Memory: {_index.memory_bytes()} bytes"
+    )
+    _lookup = WordformLookup(rows)
+    logger.log_info(f"Wordform lookup built | Time: {_lookup.build_seconds} seconds")
+    return _index, _lookup
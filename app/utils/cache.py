@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from time import monotonic
+
+
+class CacheStats:
+    """Hit/miss counters of a cache, kept per worker process."""
+
+    __slots__ = ("name", "hits", "misses")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self, count: int = 1) -> None:
+        self.hits += count
+
+    def miss(self, count: int = 1) -> None:
+        self.misses += count
+
+    def as_dict(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# every cache of this worker, exposed by the health router
+_registry: dict[str, CacheStats] = {}
+
+
+def register_cache_stats(name: str) -> CacheStats:
+    if name not in _registry:
+        _registry[name] = CacheStats(name)
+    return _registry[name]
+
+
+def get_cache_stats() -> dict:
+    return {name: stats.as_dict() for name, stats in _registry.items()}
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire `ttl` seconds after they are set."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = register_cache_stats(name)
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            self.stats.miss()
+            return default
+        value, expires_at = item
+        if expires_at < monotonic():
+            del self._data[key]
+            self.stats.miss()
+            return default
+        self._data.move_to_end(key)
+        self.stats.hit()
+        return value
+
+    def set(self, key, value) -> None:
+        self._data[key] = (value, monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        item = self._data.pop(key, None)
+        return default if item is None else item[0]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -5,3 +5,90 @@ LOGGING_DEFAULT_CONSOLE_LOG_LEVEL = "INFO"
 LOGGING_DEFAULT_MAX_BYTES = 10485760
 LOGGING_DEFAULT_BACKUP_COUNT = 10
 LOGGING_DEFAULT_LOGGING_WORKERS = 1
+
+# api/posts.py
+POSTS_PAGE_DEFAULT_LIMIT = 20
+POSTS_PAGE_MAX_LIMIT = 100
+
+# services/posts.py
+POSTS_CACHE_KEY_PREFIX = "posts:cache:"
+POSTS_CACHE_TTL = 300
+POSTS_CACHE_TTL_JITTER = 60
+POSTS_CACHE_LOCK_TTL_MS = 2000
+POSTS_CACHE_LOCK_WAIT = 0.05
+POSTS_CACHE_LOCK_RETRIES = 20
+POSTS_EXPORT_CHUNK_SIZE = 1000
+
+# services/importer.py
+POSTS_IMPORT_CHUNK_SIZE = 5000
+POSTS_IMPORT_MAX_REPORTED_ERRORS = 100
+
+# services/search.py
+SEARCH_TEXT_CONFIG = "english"
+SEARCH_HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=30, MinWords=10, StartSel=<b>, StopSel=</b>"
+
+# services/category.py
+CATEGORY_RECONCILE_INTERVAL = 3600
+CATEGORY_RECONCILE_LOCK_KEY = "category:reconcile:lock"
+CATEGORY_CACHE_MAX_SIZE = 10_000
+CATEGORY_CACHE_TTL = 60
+CATEGORY_INVALIDATION_CHANNEL = "category:invalidate"
+
+# services/views.py
+POSTS_VIEWS_PENDING_KEY = "posts:views:pending"
+POSTS_VIEWS_FLUSH_INTERVAL = 10
+
+# services/trending.py
+TRENDING_KEY_PREFIX = "posts:trending:"
+TRENDING_HALF_LIFE = 6 * 3600
+TRENDING_REBASE_INTERVAL = 3600
+TRENDING_MAX_SIZE = 1000
+TRENDING_MIN_SCORE = 0.01
+TRENDING_VIEW_WEIGHT = 1
+TRENDING_EDIT_WEIGHT = 3
+TRENDING_CREATE_WEIGHT = 5
+
+# api/shakespeare.py
+SHAKESPEARE_PAGE_DEFAULT_LIMIT = 100
+SHAKESPEARE_PAGE_MAX_LIMIT = 1000
+
+# services/wordforms.py
+WORDFORM_PRECOMPUTED_PREFIX_LENGTH = 2
+WORDFORM_COMPLETE_MAX_LIMIT = 50
+WORDFORM_COMPLETE_DEFAULT_LIMIT = 10
+WORDFORM_FUZZY_MAX_DISTANCE = 2
+WORDFORM_FUZZY_DEFAULT_DISTANCE = 1
+
+# services/concordance.py
+CONCORDANCE_BUILD_CHUNK_SIZE = 5000
+CONCORDANCE_REFRESH_INTERVAL = 600
+CONCORDANCE_CONTEXT_CHARS = 40
+CONCORDANCE_PAGE_DEFAULT_LIMIT = 50
+CONCORDANCE_PAGE_MAX_LIMIT = 500
+
+# services/corpus_stats.py
+CORPUS_STATS_TOP_WORDS = 20
+CORPUS_STATS_SPEECH_LENGTH_BINS = (0, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# services/seed_loader.py
+SEED_COPY_CHUNK_SIZE = 10_000
+
+# services/paragraphs.py
+SHAKESPEARE_STREAM_CHUNK_SIZE = 500
+
+# services/snapshot.py
+SHAKESPEARE_SNAPSHOT_MAGIC = b"SHKSNAP1"
+
+# services/auth.py
+AUTH_TOKEN_CACHE_MAX_SIZE = 100_000
+AUTH_TOKEN_CACHE_TTL = 30
+AUTH_REVOCATION_CHANNEL = "auth:revoke"
+
+# services/revocation.py
+AUTH_REVOKED_TOKENS_KEY = "auth:revoked"
+AUTH_TOKEN_ID_REVOCATION_CHANNEL = "auth:revoke:id"
+AUTH_REVOKED_TOKENS_SYNC_INTERVAL = 60
+
+# services/passwords.py
+PASSWORD_HASH_WORKERS = 4
+PASSWORD_HASH_MAX_PENDING = 64
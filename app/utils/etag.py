@@ -0,0 +1,52 @@
+import json
+from hashlib import blake2b
+
+
+def make_etag(payload: str | bytes) -> str:
+    """Strong ETag of a serialized representation."""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    return f'"{blake2b(payload, digest_size=16).hexdigest()}"'
+
+
+def make_fields_etag(obj, fields: tuple[str, ...]) -> str:
+    """
+    Strong validator of the editable attributes of `obj`, for representations holding counters.
+
+    It is compared strongly with the If-Match of an update. The representation also
+    holds counters that change without an edit, so two different bodies share it: it
+    is sent weak (see `weak_etag`) on reads, whose If-None-Match compares weakly.
+    """
+    return make_etag(json.dumps([getattr(obj, field) for field in fields], separators=(",", ":")))
+
+
+def weak_etag(etag: str) -> str:
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+def etag_matches(header: str | None, etag: str, weak: bool = True) -> bool:
+    """
+    Check an If-None-Match (weak comparison) or If-Match (strong comparison) header.
+
+    :param header: header value, e.g. `"abc", W/"def"` or `*`
+    :param etag: current ETag of the resource
+    :param weak: False for If-Match, weak validators never match then, on either side
+    :return: True if one of the listed tags matches
+    """
+    if not header:
+        return False
+    if etag.startswith("W/"):
+        if not weak:
+            return False
+        etag = etag[2:]
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            if not weak:
+                continue
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
@@ -0,0 +1,42 @@
+import base64
+import binascii
+import json
+
+# custom imports
+from app.exceptions import BadRequestHTTPException
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encode the sort key of the last row of a page into an opaque cursor.
+
+    :param values: sort key values of the last row (e.g. category_id, id)
+    :return: url-safe cursor string
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _is_instance(value, types) -> bool:
+    # json booleans are python ints, they are never a valid sort key
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor: str, types: tuple) -> tuple:
+    """
+    Decode a cursor created by `encode_cursor`.
+
+    :param cursor: cursor string sent back by the client
+    :param types: expected type (or tuple of types) of each value of the sort key, e.g. (int, int)
+    :return: tuple of sort key values
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError) as ex:
+        raise BadRequestHTTPException("Invalid cursor") from ex
+    if not isinstance(values, list) or len(values) != len(types):
+        raise BadRequestHTTPException("Invalid cursor")
+    if not all(_is_instance(value, value_types) for value, value_types in zip(values, types)):
+        raise BadRequestHTTPException("Invalid cursor")
+    return tuple(values)
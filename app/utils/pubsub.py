@@ -0,0 +1,54 @@
+import asyncio
+from collections.abc import Callable
+
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError
+
+# custom imports
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+
+class PubSubListener:
+    """
+    Dispatch the messages of Redis pub/sub channels to in-process handlers.
+
+    One listener runs per worker. Messages published while the connection is down
+    are lost, so every channel can register a `reset` callback that is called after
+    each reconnection, e.g. to clear a local cache.
+    """
+
+    RECONNECT_DELAY = 1.0
+
+    def __init__(self, redis: Redis) -> None:
+        self._redis = redis
+        self._handlers: dict[str, Callable[[str], None]] = {}
+        self._resets: list[Callable[[], None]] = []
+
+    def register(self, channel: str, handler: Callable[[str], None], reset: Callable[[], None] | None = None) -> None:
+        self._handlers[channel] = handler
+        if reset is not None:
+            self._resets.append(reset)
+
+    async def run(self) -> None:
+        reconnecting = False
+        while True:
+            try:
+                async with self._redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(*self._handlers)
+                    if reconnecting:
+                        for reset in self._resets:
+                            reset()
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        try:
+                            self._handlers[message["channel"]](message["data"])
+                        except Exception as ex:
+                            logger.log_error(f"Pub/sub handler of {message['channel']} failed | Error: {ex!r}")
+            except ConnectionError as ex:
+                logger.log_warning(f"Pub/sub connection lost, reconnecting | Error: {ex!r}")
+                reconnecting = True
+                await asyncio.sleep(self.RECONNECT_DELAY)
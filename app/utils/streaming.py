@@ -0,0 +1,10 @@
+import json
+from collections.abc import Iterable
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def ndjson_chunk(rows: Iterable[dict]) -> bytes:
+    """Serialize rows as newline-delimited JSON, one chunk of a streaming response."""
+    return "".join(json.dumps(row, default=str) + "\n" for row in rows).encode("utf-8")
+
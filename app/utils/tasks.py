@@ -0,0 +1,34 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+
+# custom imports
+from app.utils.logging import Logger
+
+
+logger = Logger()
+
+
+async def run_periodically(name: str, interval: float, job: Callable[[], Awaitable]) -> None:
+    """Run `job` every `interval` seconds until cancelled, a failing run does not stop the loop."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            logger.log_error(f"Background job {name} failed | Error: {ex!r}")
+
+
+def start_background_task(app, coro) -> asyncio.Task:
+    """Start a task that lives as long as the app, see `stop_background_tasks`."""
+    task = asyncio.create_task(coro)
+    app.state.background_tasks.append(task)
+    return task
+
+
+async def stop_background_tasks(app) -> None:
+    for task in app.state.background_tasks:
+        task.cancel()
+    await asyncio.gather(*app.state.background_tasks, return_exceptions=True)
+    app.state.background_tasks.clear()
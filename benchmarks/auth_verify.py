@@ -0,0 +1,72 @@
+"""
+Compare the access token verification modes.
+
+Times `AuthBearer` against a fresh token with the Redis lookup of every request
+(worker cache cleared), with the per-worker token cache, and in the stateless mode
+where only the signature, the expiry and the in-memory revocation filter are checked.
+Needs a running Redis, JWT_ACCESS_KEY defaults to a benchmark key.
+
+    python -m benchmarks.auth_verify --requests 10000
+"""
+import argparse
+import asyncio
+import uuid
+from time import perf_counter
+from types import SimpleNamespace
+
+# custom imports
+from app.config import settings as global_settings
+from app.redis import get_redis
+from app.services.auth import AuthBearer, issue_tokens, token_cache
+from app.services.revocation import revoked_tokens
+
+
+def make_request(redis, token: str):
+    return SimpleNamespace(
+        app=SimpleNamespace(state=SimpleNamespace(redis=redis)),
+        headers={"User-Agent": "benchmark", "Authorization": f"Bearer {token}"},
+        state=SimpleNamespace(),
+    )
+
+
+async def timed(fn, requests: int) -> float:
+    start = perf_counter()
+    for _ in range(requests):
+        await fn()
+    return perf_counter() - start
+
+
+async def main(args):
+    redis = await get_redis()
+    global_settings.jwt_access_key = global_settings.jwt_access_key or "benchmark-access-key"
+    user = SimpleNamespace(id=uuid.uuid4(), email="bench@example.com", nickname="bench", password="bench")
+    # HTTPBearer only reads the Authorization header of the request
+    bearer = AuthBearer()
+
+    results = {}
+    for stateless in (False, True):
+        global_settings.jwt_stateless = stateless
+        token, refresh_token = await issue_tokens(user, make_request(redis, ""))
+        request = make_request(redis, token)
+        if stateless:
+            await revoked_tokens.sync(redis)
+            results["stateless"] = await timed(lambda: bearer(request), args.requests)
+        else:
+            async def uncached():
+                token_cache.clear()
+                return await bearer(request)
+
+            results["redis"] = await timed(uncached, args.requests)
+            results["cached"] = await timed(lambda: bearer(request), args.requests)
+        await redis.delete(token, refresh_token)
+
+    print(f"{'mode':<12} {'total s':>10} {'us/request':>12} {'requests/s':>12}")
+    for name, elapsed in results.items():
+        print(f"{name:<12} {elapsed:>10.3f} {elapsed / args.requests * 1e6:>12.1f} {args.requests / elapsed:>12.0f}")
+    await redis.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10_000, help="verifications per mode")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,117 @@
+"""
+Compare the full-text search of the posts with a naive ILIKE scan.
+
+Seeds a synthetic corpus into the posts table with COPY (under a dedicated
+category id, so it can be dropped afterwards) and times both queries.
+
+    python -m benchmarks.posts_search --rows 1000000 --repeat 5
+"""
+import argparse
+import asyncio
+import random
+from itertools import accumulate
+from time import perf_counter
+
+from sqlalchemy import delete, func, select, text
+
+# custom imports
+from app.database import engine, AsyncSessionFactory
+from app.models.posts import Posts
+from app.services.search import search_posts
+
+BENCH_CATEGORY_ID = 987_654
+BENCH_AUTHOR_ID = 0
+VOCABULARY_SIZE = 20_000
+COPY_CHUNK_SIZE = 50_000
+QUERIES = ("board", "keyset pagination", "word42", "word7 word1999", "word19999")
+
+
+def make_vocabulary(size: int) -> list[str]:
+    return ["board", "keyset", "pagination", "server"] + [f"word{i}" for i in range(size)]
+
+
+def make_records(rows: int, vocabulary: list[str]):
+    # zipf-like word frequencies, like real text
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    for _ in range(rows):
+        title = " ".join(random.choices(vocabulary, cum_weights=cum_weights, k=6))
+        content = " ".join(random.choices(vocabulary, cum_weights=cum_weights, k=80))
+        yield title, content, BENCH_AUTHOR_ID, BENCH_CATEGORY_ID
+
+
+async def seed(rows: int):
+    vocabulary = make_vocabulary(VOCABULARY_SIZE)
+    start = perf_counter()
+    async with engine.connect() as conn:
+        raw_conn = await conn.get_raw_connection()
+        driver_conn = raw_conn.driver_connection
+        chunk = []
+        for record in make_records(rows, vocabulary):
+            chunk.append(record)
+            if len(chunk) == COPY_CHUNK_SIZE:
+                await driver_conn.copy_records_to_table(
+                    Posts.__tablename__, records=chunk, columns=("title", "content", "author_id", "category_id")
+                )
+                chunk = []
+        if chunk:
+            await driver_conn.copy_records_to_table(
+                Posts.__tablename__, records=chunk, columns=("title", "content", "author_id", "category_id")
+            )
+        await driver_conn.execute(f"ANALYZE {Posts.__tablename__}")
+    print(f"seeded {rows} posts in {perf_counter() - start:.1f}s")
+
+
+async def ilike(db_session, q: str, limit: int):
+    # the naive way: sequential scan over every title and content
+    conditions = [Posts.title.ilike(f"%{word}%") | Posts.content.ilike(f"%{word}%") for word in q.split()]
+    stmt = select(Posts.id, Posts.title).where(*conditions).order_by(Posts.id.desc()).limit(limit)
+    result = await db_session.execute(stmt)
+    return result.all()
+
+
+async def timed(fn, repeat: int) -> tuple[float, int]:
+    best, rows = float("inf"), 0
+    for _ in range(repeat):
+        start = perf_counter()
+        rows = len(await fn())
+        best = min(best, perf_counter() - start)
+    return best, rows
+
+
+async def main(args):
+    if args.rows:
+        await seed(args.rows)
+
+    async with AsyncSessionFactory() as db_session:
+        total = await db_session.scalar(select(func.count()).select_from(Posts))
+        print(f"posts table holds {total} rows\n")
+        print(f"{'query':<20} {'fts ms':>10} {'ilike ms':>10} {'speedup':>8}")
+        for q in QUERIES:
+            fts_time, _ = await timed(lambda: search_posts(db_session, q, args.limit), args.repeat)
+            ilike_time, _ = await timed(lambda: ilike(db_session, q, args.limit), args.repeat)
+            print(f"{q:<20} {fts_time * 1000:>10.2f} {ilike_time * 1000:>10.2f} {ilike_time / fts_time:>7.1f}x")
+
+        if args.explain:
+            plan = await db_session.execute(
+                text(
+                    "EXPLAIN ANALYZE SELECT id FROM posts "
+                    "WHERE search_vector @@ websearch_to_tsquery('english', :q) LIMIT :limit"
+                ),
+                {"q": QUERIES[0], "limit": args.limit},
+            )
+            print("\n" + "\n".join(row[0] for row in plan))
+
+        if args.cleanup:
+            await db_session.execute(delete(Posts).where(Posts.category_id == BENCH_CATEGORY_ID))
+            await db_session.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic posts to seed, 0 to reuse the table")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query, the best one is reported")
+    parser.add_argument("--limit", type=int, default=20, help="page size")
+    parser.add_argument("--explain", action="store_true", help="print the plan of the full-text query")
+    parser.add_argument("--cleanup", action="store_true", help="delete the synthetic posts afterwards")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,75 @@
+"""
+Compare `Paragraph.find` (ORM graph with selectin relationships) with the
+keyset-paginated projection of `Paragraph.find_projection`.
+
+Both paths are timed end to end, query plus JSON serialization, and the number
+of SQL statements each one issues is counted. Needs the seeded shakespeare schema.
+
+    python -m benchmarks.shakespeare_paragraphs --character Hamlet --repeat 5
+"""
+import argparse
+import asyncio
+from time import perf_counter
+
+from sqlalchemy import event
+
+# custom imports
+from app.database import engine, AsyncSessionFactory
+from app.models.shakespeare import Paragraph
+from app.schemas.shakespeare import Paragraph as ParagraphSchema, ParagraphProjection
+
+statements = 0
+
+
+def count_statement(*args):
+    global statements
+    statements += 1
+
+
+async def full_graph(character: str, page_size: int) -> int:
+    async with AsyncSessionFactory() as db_session:
+        _paragraphs = await Paragraph.find(db_session, character)
+        body = "[" + ",".join(
+            ParagraphSchema.model_validate(p, from_attributes=True).model_dump_json() for p in _paragraphs
+        ) + "]"
+    return len(body)
+
+
+async def projection(character: str, page_size: int) -> int:
+    size, after = 0, None
+    async with AsyncSessionFactory() as db_session:
+        while True:
+            rows = await Paragraph.find_projection(db_session, character, page_size, after=after)
+            size += len("[" + ",".join(ParagraphProjection.model_validate(row).model_dump_json() for row in rows) + "]")
+            if len(rows) < page_size:
+                return size
+            after = (rows[-1].work_id, rows[-1].paragraph_num)
+
+
+async def timed(fn, args) -> tuple[float, int, int]:
+    global statements
+    best, size, issued = float("inf"), 0, 0
+    for _ in range(args.repeat):
+        statements = 0
+        start = perf_counter()
+        size = await fn(args.character, args.page_size)
+        best = min(best, perf_counter() - start)
+        issued = statements
+    return best, size, issued
+
+
+async def main(args):
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    print(f"{'path':<12} {'ms':>10} {'bytes':>12} {'statements':>11}")
+    for name, fn in (("find", full_graph), ("projection", projection)):
+        elapsed, size, issued = await timed(fn, args)
+        print(f"{name:<12} {elapsed * 1000:>10.2f} {size:>12} {issued:>11}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--character", default="Hamlet", help="character name")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per path, the best one is reported")
+    parser.add_argument("--page-size", type=int, default=1000, help="page size of the projection")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,103 @@
+"""
+Compare the in-memory wordform lookup with the equivalent database queries.
+
+Sounds-like and inflections are timed against an equality scan on the phonetic
+and stem columns, and the BK-tree against `levenshtein()` of the fuzzystrmatch
+extension (created if missing) or a LIKE pattern when it cannot be created.
+Needs the seeded shakespeare schema.
+
+    python -m benchmarks.wordform_lookup --repeat 5 --max-distance 2
+"""
+import argparse
+import asyncio
+from time import perf_counter
+
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.exc import DBAPIError
+
+# custom imports
+from app.database import engine, AsyncSessionFactory
+from app.models.shakespeare import Wordform
+from app.services.wordforms import load_wordforms
+
+WORDS = ("love", "loving", "kingdum", "nite", "sweat")
+
+
+async def db_same_column(db_session, column, word: str, limit: int):
+    code = select(column).where(Wordform.plain_text == word).limit(1).scalar_subquery()
+    stmt = select(Wordform.plain_text).where(column == code).order_by(Wordform.occurences.desc()).limit(limit)
+    return (await db_session.execute(stmt)).all()
+
+
+async def db_levenshtein(db_session, word: str, max_distance: int, limit: int):
+    distance = func.levenshtein(Wordform.plain_text, word)
+    stmt = (
+        select(Wordform.plain_text, distance)
+        .where(distance <= max_distance)
+        .order_by(distance, Wordform.occurences.desc())
+        .limit(limit)
+    )
+    return (await db_session.execute(stmt)).all()
+
+
+async def db_like(db_session, word: str, max_distance: int, limit: int):
+    # one wildcard per position: a rough stand-in for a single substitution
+    patterns = [word[:i] + "_" + word[i + 1:] for i in range(len(word))]
+    stmt = (
+        select(Wordform.plain_text)
+        .where(or_(*(Wordform.plain_text.like(pattern) for pattern in patterns)))
+        .order_by(Wordform.occurences.desc())
+        .limit(limit)
+    )
+    return (await db_session.execute(stmt)).all()
+
+
+async def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+        best = min(best, perf_counter() - start)
+    return best
+
+
+async def main(args):
+    start = perf_counter()
+    _, lookup = await load_wordforms()
+    print(f"lookup built in {perf_counter() - start:.2f}s\n")
+
+    async with AsyncSessionFactory() as db_session:
+        try:
+            await db_session.execute(text("CREATE EXTENSION IF NOT EXISTS fuzzystrmatch"))
+            await db_session.commit()
+            db_fuzzy, db_fuzzy_name = db_levenshtein, "levenshtein"
+        except DBAPIError:
+            await db_session.rollback()
+            db_fuzzy, db_fuzzy_name = db_like, "like"
+
+        print(f"{'query':<26} {'memory ms':>10} {'db ms':>10} {'speedup':>8}")
+        for word in WORDS:
+            cases = (
+                ("sounds-like", lambda: lookup.sounds_like(word, args.limit),
+                 lambda: db_same_column(db_session, Wordform.phonetic_text, word, args.limit)),
+                ("inflections", lambda: lookup.inflections(word, args.limit),
+                 lambda: db_same_column(db_session, Wordform.stem_text, word, args.limit)),
+                (db_fuzzy_name, lambda: lookup.fuzzy(word, args.max_distance, args.limit),
+                 lambda: db_fuzzy(db_session, word, args.max_distance, args.limit)),
+            )
+            for name, memory_fn, db_fn in cases:
+                memory_time = await timed(memory_fn, args.repeat)
+                db_time = await timed(db_fn, args.repeat)
+                label = f"{name} {word}"
+                print(f"{label:<26} {memory_time * 1000:>10.3f} {db_time * 1000:>10.3f} {db_time / memory_time:>7.1f}x")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query, the best one is reported")
+    parser.add_argument("--limit", type=int, default=10, help="number of words returned")
+    parser.add_argument("--max-distance", type=int, default=2, help="edit distance of the fuzzy match")
+    asyncio.run(main(parser.parse_args()))
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from httpx import AsyncClient
 from starlette import status
@@ -28,5 +30,55 @@ async def test_get_token(client: AsyncClient):
     assert claimset["platform"] == "python-httpx/0.25.0"
 
 
-# TODO: baerer token test
-# TODO: > get token > test endpoint auth with token > expire token on redis > test endpoint auth with token
+async def signin(client: AsyncClient) -> dict:
+    # a new pair for the user of the `auth_headers` fixture, whose own token is shared by other tests
+    response = await client.post("/user/signin", json={"email": "fixture@grillazz.com", "password": "s1lly"})
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.json()
+
+
+def bearer(access_token: str) -> dict:
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+async def test_refresh_token(client: AsyncClient, auth_headers: dict):
+    tokens = await signin(client)
+    response = await client.post("/user/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == status.HTTP_200_OK
+    refreshed = response.json()
+    assert refreshed["access_token"] != tokens["access_token"]
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+
+    # a refresh token is used once
+    response = await client.post("/user/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    response = await client.get("/health/cache", headers=bearer(tokens["access_token"]))
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = await client.get("/health/cache", headers=bearer(refreshed["access_token"]))
+    assert response.status_code == status.HTTP_200_OK
+
+
+async def test_signout(client: AsyncClient, auth_headers: dict):
+    tokens = await signin(client)
+    response = await client.get("/health/cache", headers=bearer(tokens["access_token"]))
+    assert response.status_code == status.HTTP_200_OK
+    response = await client.post("/user/signout", headers=bearer(tokens["access_token"]))
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await client.get("/health/cache", headers=bearer(tokens["access_token"]))
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    # the refresh token issued with it is revoked too
+    response = await client.post("/user/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+async def test_concurrent_refresh(client: AsyncClient, auth_headers: dict):
+    tokens = await signin(client)
+    responses = await asyncio.gather(
+        *(client.post("/user/token/refresh", json={"refresh_token": tokens["refresh_token"]}) for _ in range(2))
+    )
+    assert sorted(response.status_code for response in responses) == [
+        status.HTTP_200_OK,
+        status.HTTP_403_FORBIDDEN,
+    ]
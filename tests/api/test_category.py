@@ -0,0 +1,32 @@
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.database import AsyncSessionFactory
+from app.models.category import Category
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_get_category_post_count(client: AsyncClient, auth_headers: dict):
+    async with AsyncSessionFactory() as db_session:
+        _category = Category(name="counted", author_id=1)
+        db_session.add(_category)
+        await db_session.commit()
+        category_id = _category.id
+
+    # the first read caches the category, creating a post must drop it
+    response = await client.get(f"/category/{category_id}", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["post_count"] == 0
+    etag = response.headers["ETag"]
+
+    payload = {"title": "counted", "content": "hello board", "author_id": 1, "category_id": category_id}
+    response = await client.post("/posts/", json=payload)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = await client.get(f"/category/{category_id}", headers=auth_headers)
+    assert response.json()["post_count"] == 1
+    # the counter is not an edit, the ETag stays, weak since the bodies differ
+    assert response.headers["ETag"] == etag
+    assert etag.startswith("W/")
@@ -0,0 +1,160 @@
+import base64
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.database import AsyncSessionFactory
+from app.main import app
+from app.models.category import Category
+from app.services.views import flush_post_views
+from app.utils.constants import POSTS_VIEWS_PENDING_KEY
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize(
+    "category_id, total, limit",
+    (
+        (1001, 5, 2),
+    ),
+)
+async def test_list_posts_by_cursor(client: AsyncClient, category_id: int, total: int, limit: int):
+    for i in range(total):
+        payload = {"title": f"post-{i}", "content": "hello board", "author_id": 1, "category_id": category_id}
+        response = await client.post("/posts/", json=payload)
+        assert response.status_code == status.HTTP_201_CREATED
+
+    titles = []
+    cursor = None
+    while True:
+        params = {"category_id": category_id, "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/posts/", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        assert len(page["items"]) <= limit
+        titles.extend(item["title"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    # newest first, every post exactly once
+    assert titles == [f"post-{i}" for i in reversed(range(total))]
+
+
+async def test_get_post_after_update(client: AsyncClient):
+    payload = {"title": "cached", "content": "first", "author_id": 1, "category_id": 1002}
+    await client.post("/posts/", json=payload)
+    response = await client.get("/posts/", params={"category_id": 1002, "limit": 1})
+    post_id = response.json()["items"][0]["id"]
+
+    # the first read fills the cache, the update must invalidate it
+    response = await client.get(f"/posts/{post_id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["content"] == "first"
+
+    response = await client.patch(f"/posts/{post_id}", json={**payload, "content": "second"})
+    assert response.status_code == status.HTTP_200_OK
+    response = await client.get(f"/posts/{post_id}")
+    assert response.json()["content"] == "second"
+
+
+async def test_get_post_etag(client: AsyncClient):
+    payload = {"title": "etag", "content": "first", "author_id": 1, "category_id": 1003}
+    await client.post("/posts/", json=payload)
+    response = await client.get("/posts/", params={"category_id": 1003, "limit": 1})
+    post_id = response.json()["items"][0]["id"]
+
+    response = await client.get(f"/posts/{post_id}")
+    etag = response.headers["ETag"]
+    response = await client.get(f"/posts/{post_id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # the body holds the view counter, the ETag of a read is weak and If-Match compares strongly
+    assert etag.startswith("W/")
+    response = await client.patch(f"/posts/{post_id}", json={**payload, "content": "second"}, headers={"If-Match": etag})
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+    # an update with the strong validator of the edited fields goes through and changes the ETag
+    response = await client.patch(
+        f"/posts/{post_id}", json={**payload, "content": "second"}, headers={"If-Match": etag.removeprefix("W/")}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    response = await client.get(f"/posts/{post_id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+
+async def test_get_post_not_modified_counts_view(client: AsyncClient):
+    payload = {"title": "etag-count", "content": "first", "author_id": 1, "category_id": 1005}
+    await client.post("/posts/", json=payload)
+    response = await client.get("/posts/", params={"category_id": 1005, "limit": 1})
+    post_id = response.json()["items"][0]["id"]
+
+    response = await client.get(f"/posts/{post_id}")
+    etag = response.headers["ETag"]
+    pending = int(await app.state.redis.hget(POSTS_VIEWS_PENDING_KEY, post_id) or 0)
+    response = await client.get(f"/posts/{post_id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    # a revalidated read is counted like a full one
+    assert int(await app.state.redis.hget(POSTS_VIEWS_PENDING_KEY, post_id)) == pending + 1
+
+
+async def test_update_post_if_match_after_views_flush(client: AsyncClient):
+    payload = {"title": "etag-views", "content": "first", "author_id": 1, "category_id": 1004}
+    await client.post("/posts/", json=payload)
+    response = await client.get("/posts/", params={"category_id": 1004, "limit": 1})
+    post_id = response.json()["items"][0]["id"]
+
+    # the read counts a view, the flush writes it and drops the cached post
+    response = await client.get(f"/posts/{post_id}")
+    etag, view_count = response.headers["ETag"], response.json()["view_count"]
+    await flush_post_views(app.state.redis)
+    response = await client.get(f"/posts/{post_id}")
+    assert response.json()["view_count"] > view_count
+    assert response.headers["ETag"] == etag
+
+    # the counter is not an edit, the update still goes through
+    response = await client.patch(
+        f"/posts/{post_id}", json={**payload, "content": "second"}, headers={"If-Match": etag.removeprefix("W/")}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.parametrize("values", ('["a","b"]', "[1]", "[true,1]", '{"a":1}'))
+async def test_list_posts_invalid_cursor(client: AsyncClient, values: str):
+    cursor = base64.urlsafe_b64encode(values.encode("utf-8")).decode("ascii")
+    response = await client.get("/posts/", params={"cursor": cursor})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_bulk_create_posts(client: AsyncClient, auth_headers: dict):
+    async with AsyncSessionFactory() as db_session:
+        _category = Category(name="bulk", author_id=1)
+        db_session.add(_category)
+        await db_session.commit()
+        category_id = _category.id
+
+    body = (
+        "title,content,author_id,category_id\n"
+        f'first,"two\nlines",1,{category_id}\n'
+        f"second,plain,1,{category_id}\n"
+        "broken,row\n"
+        f"third,plain,not-a-number,{category_id}\n"
+    )
+    response = await client.post("/posts/bulk", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    headers = {**auth_headers, "Content-Type": "text/csv"}
+    response = await client.post("/posts/bulk", content=body, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    report = response.json()
+    assert (report["total_rows"], report["inserted_rows"], report["failed_rows"]) == (4, 2, 2)
+    assert [error["line"] for error in report["errors"]] == [5, 6]
+
+    # the counter of the category follows the copied rows
+    async with AsyncSessionFactory() as db_session:
+        _category = await Category.find(db_session, [Category.id == category_id])
+        assert _category.post_count == 2
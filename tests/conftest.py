@@ -35,4 +35,21 @@ async def client(start_db) -> AsyncClient:
         headers={"Content-Type": "application/json"},
     ) as test_client:
         app.state.redis = await get_redis()
+        # the database is recreated and its ids restart, the cached posts of a previous run must go
+        async for key in app.state.redis.scan_iter(match="posts:*"):
+            await app.state.redis.delete(key)
         yield test_client
+
+
+@pytest.fixture(scope="session")
+async def auth_headers(client: AsyncClient) -> dict:
+    payload = {
+        "email": "fixture@grillazz.com",
+        "first_name": "Fixture",
+        "last_name": "User",
+        "nickname": "fixture",
+        "password": "s1lly",
+    }
+    await client.post("/user/", json=payload)
+    response = await client.post("/user/signin", json={"email": payload["email"], "password": payload["password"]})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
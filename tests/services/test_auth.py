@@ -0,0 +1,39 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.auth import TokenPayload, token_cache, token_digest, verify_jwt
+
+pytestmark = pytest.mark.anyio
+
+
+class StubRedis:
+    def __init__(self, fields: dict) -> None:
+        self.fields = fields
+
+    async def hgetall(self, key):
+        return self.fields.get(key, {})
+
+
+def make_request(redis) -> SimpleNamespace:
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(redis=redis)), state=SimpleNamespace())
+
+
+@pytest.mark.parametrize("lifetime, verified", [(60, True), (0, False), (-60, False)])
+async def test_verify_jwt_checks_cached_expiry(lifetime, verified):
+    token = f"cached-token-{lifetime}"
+    payload = TokenPayload("1", "joe@grillazz.com", "joe", time.time() + lifetime, jti="jti")
+    token_cache.set(token_digest(token), payload)
+    # the hash is still in redis, the expiry of the cached payload decides
+    request = make_request(StubRedis({token: payload.fields()}))
+    assert await verify_jwt(request, token) is verified
+    assert (token_cache.get(token_digest(token)) is not None) is verified
+
+
+async def test_verify_jwt_checks_stored_expiry():
+    token = "stored-token"
+    payload = TokenPayload("1", "joe@grillazz.com", "joe", time.time() - 1, jti="jti")
+    request = make_request(StubRedis({token: payload.fields()}))
+    assert await verify_jwt(request, token) is False
+    assert token_cache.get(token_digest(token)) is None
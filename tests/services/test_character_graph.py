@@ -0,0 +1,49 @@
+import json
+from collections import Counter
+from itertools import combinations
+
+from app.services.character_graph import WorkGraph
+
+NAMES = {"ham": "Hamlet", "hor": "Horatio", "oph": "Ophelia", "pol": "Polonius", "gho": "Ghost"}
+SCENES = [
+    {"ham", "hor", "gho"},
+    {"ham", "hor"},
+    {"ham", "oph", "pol"},
+    {"oph", "pol"},
+    {"ham", "hor", "pol"},
+    {"hor"},
+]
+
+
+def naive_weights() -> Counter:
+    weights = Counter()
+    for cast in SCENES:
+        for a, b in combinations(sorted(cast), 2):
+            weights[a, b] += 1
+            weights[b, a] += 1
+    return weights
+
+
+def test_neighbors_match_naive_count():
+    graph = WorkGraph("hamlet", NAMES, SCENES)
+    weights = naive_weights()
+    for character_id in NAMES:
+        neighbors = graph.neighbors(character_id)
+        assert {(other, weight) for other, _, weight in neighbors} == {
+            (b, weight) for (a, b), weight in weights.items() if a == character_id
+        }
+        # the closest first, ties by id
+        assert [(-weight, other) for other, _, weight in neighbors] == sorted((-w, o) for o, _, w in neighbors)
+    assert graph.neighbors("ham", limit=1) == [("hor", "Horatio", 3)]
+    assert graph.neighbors("nobody") is None
+
+
+def test_payload():
+    graph = WorkGraph("hamlet", NAMES, SCENES)
+    payload = json.loads(graph.payload)
+    assert {node["id"]: node["scenes"] for node in payload["nodes"]} == {
+        character_id: sum(character_id in cast for cast in SCENES) for character_id in NAMES
+    }
+    assert {(edge["source"], edge["target"]): edge["weight"] for edge in payload["edges"]} == {
+        (a, b): weight for (a, b), weight in naive_weights().items() if a < b
+    }
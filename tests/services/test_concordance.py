@@ -0,0 +1,60 @@
+import re
+
+from app.services.concordance import ConcordanceIndex, context_window
+
+PARAGRAPHS = {
+    3: "To be, or not to be: that is the question.",
+    5: "O'er the hills, TO the sea. Ne'er to be seen.",
+    8: "",
+    9: "Be not afraid of greatness; to be, to be!",
+}
+
+
+def naive_occurrences(words: set[str]) -> list[tuple[int, int, str]]:
+    found = []
+    for paragraph_id, text in sorted(PARAGRAPHS.items()):
+        for match in re.finditer(r"[A-Za-z']+", text):
+            word = match.group().lower().strip("'")
+            if word in words:
+                found.append((paragraph_id, match.start(), word))
+    return found
+
+
+def build_index() -> ConcordanceIndex:
+    index = ConcordanceIndex()
+    for paragraph_id, text in sorted(PARAGRAPHS.items()):
+        index.add(paragraph_id, text)
+    return index
+
+
+def test_find_matches_naive_scan():
+    index = build_index()
+    for words in ({"to"}, {"be"}, {"to", "be"}, {"o'er", "ne'er"}, {"question", "absent"}):
+        expected = naive_occurrences(words)
+        assert index.find(words, limit=100) == expected
+        assert index.count(words) == len(expected)
+
+
+def test_find_pages_with_cursor():
+    index = build_index()
+    words = {"to", "be"}
+    pages, after = [], None
+    while page := index.find(words, limit=3, after=after):
+        pages.extend(page)
+        after = page[-1][:2]
+    assert pages == naive_occurrences(words)
+
+
+def test_refresh_skips_indexed_paragraphs():
+    index = build_index()
+    index.add(5, "to to to")
+    index.add(10, "to")
+    assert index.paragraphs == len(PARAGRAPHS) + 1
+    assert index.find({"to"}, limit=100)[-1] == (10, 0, "to")
+
+
+def test_context_window():
+    text = PARAGRAPHS[3]
+    offset = text.index("question")
+    assert context_window(text, offset, len("question"), 7) == {"left": "is the ", "match": "question", "right": "."}
+    assert context_window(text, 0, 2, 5) == {"left": "", "match": "To", "right": " be, "}
@@ -0,0 +1,51 @@
+import pytest
+
+from app.services.importer import _iter_csv, _iter_jsonl, aiter_lines
+
+pytestmark = pytest.mark.anyio
+
+
+async def chunked(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(rows) -> list:
+    return [row async for row in rows]
+
+
+async def test_lines_utf8_split_across_chunks():
+    body = "première\r\nsecond ☃\nlast".encode("utf-8")
+    # cut inside the two byte "è" and the three byte "☃"
+    cut_1, cut_2 = body.index("è".encode("utf-8")) + 1, body.index("☃".encode("utf-8")) + 2
+    lines = await collect(aiter_lines(chunked(body[:cut_1], body[cut_1:cut_2], body[cut_2:])))
+    assert lines == ["première", "second ☃", "last"]
+
+
+async def test_csv_multiline_quoted_field():
+    body = b'title,content,author_id,category_id\n"a","line 1\nline ""2""",1,7\nb,plain,2,7\n'
+    rows = await collect(_iter_csv(aiter_lines(chunked(body[:20], body[20:45], body[45:]))))
+    assert rows == [
+        (2, {"title": "a", "content": 'line 1\nline "2"', "author_id": "1", "category_id": "7"}, None),
+        (4, {"title": "b", "content": "plain", "author_id": "2", "category_id": "7"}, None),
+    ]
+
+
+async def test_csv_row_errors():
+    body = b'title,content,author_id,category_id\nshort,row\nok,row,1,7\n"open,quote,1,7\n'
+    rows = await collect(_iter_csv(aiter_lines(chunked(body))))
+    assert [(line, error) for line, _, error in rows] == [
+        (2, "expected 4 fields, got 2"),
+        (3, None),
+        (4, "unterminated quoted field"),
+    ]
+
+
+async def test_jsonl_row_errors():
+    body = b'{"title": "a"}\n\nnot json\n{"title": "b"}'
+    rows = await collect(_iter_jsonl(aiter_lines(chunked(body))))
+    assert [(line, row, error is not None) for line, row, error in rows] == [
+        (1, {"title": "a"}, False),
+        (3, None, True),
+        (4, {"title": "b"}, False),
+    ]
@@ -0,0 +1,136 @@
+import pytest
+
+from app.services.snapshot import Snapshot, write_snapshot
+
+WORKS = [("hamlet", "Hamlet"), ("macbeth", "Macbeth")]
+CHAPTERS = [("hamlet", 1, 1, "Elsinore. A platform"), ("hamlet", 1, 2, "A room of state"), ("macbeth", 1, 1, "A heath")]
+# two characters share a name, their paragraphs are merged by (work_id, paragraph_num)
+CHARACTERS = [("ghost-h", "Ghost", None), ("hamlet", "Hamlet", "Prince"), ("ghost-m", "Ghost", "Banquo’s ghost")]
+# (id, work_id, paragraph_num, character_id, section, chapter, text)
+PARAGRAPHS = [
+    (1, "hamlet", 30, "ghost-h", 1, 2, "Mark me."),
+    (2, "hamlet", 10, "hamlet", 1, 1, "Who’s there?"),
+    (3, "macbeth", 5, "ghost-m", 1, 1, "..."),
+    (4, "hamlet", 20, "ghost-h", 1, 1, "I am thy father's spirit"),
+    (5, "hamlet", 40, "hamlet", 1, 2, "O, that this too too solid flesh would melt"),
+    (6, "macbeth", 1, "ghost-m", 1, 1, "Thou canst not say I did it"),
+]
+WORDFORMS = [(1, "thee", "0", "thee", 10), (2, "thou", "0", "thou", 12), (3, "ſpirit", "SPRT", "spirit", 1)]
+
+
+def make_columns() -> dict:
+    return {
+        "work": {
+            "id": [work_id for work_id, _ in WORKS],
+            "title": [title for _, title in WORKS],
+            "long_title": [f"The Tragedy of {title}" for _, title in WORKS],
+            "year": [1600, 1606],
+            "genre_type": ["t", "t"],
+            "source": ["Moby", "Moby"],
+            "total_words": [100, 50],
+            "total_paragraphs": [4, 2],
+            "notes": [None, "Folio"],
+        },
+        "chapter": {
+            "id": list(range(1, len(CHAPTERS) + 1)),
+            "work_id": [c[0] for c in CHAPTERS],
+            "section_number": [c[1] for c in CHAPTERS],
+            "chapter_number": [c[2] for c in CHAPTERS],
+            "description": [c[3] for c in CHAPTERS],
+        },
+        "character": {
+            "id": [c[0] for c in CHARACTERS],
+            "name": [c[1] for c in CHARACTERS],
+            "abbrev": [None] * len(CHARACTERS),
+            "description": [c[2] for c in CHARACTERS],
+            "speech_count": [2, 2, 2],
+        },
+        "paragraph": {
+            "id": [p[0] for p in PARAGRAPHS],
+            "work_id": [p[1] for p in PARAGRAPHS],
+            "paragraph_num": [p[2] for p in PARAGRAPHS],
+            "character_id": [p[3] for p in PARAGRAPHS],
+            "plain_text": [p[6] for p in PARAGRAPHS],
+            "phonetic_text": [""] * len(PARAGRAPHS),
+            "stem_text": [p[6].lower() for p in PARAGRAPHS],
+            "paragraph_type": ["b"] * len(PARAGRAPHS),
+            "section_number": [p[4] for p in PARAGRAPHS],
+            "chapter_number": [p[5] for p in PARAGRAPHS],
+            "char_count": [len(p[6]) for p in PARAGRAPHS],
+            "word_count": [len(p[6].split()) for p in PARAGRAPHS],
+        },
+        "wordform": {
+            "id": [w[0] for w in WORDFORMS],
+            "plain_text": [w[1] for w in WORDFORMS],
+            "phonetic_text": [w[2] for w in WORDFORMS],
+            "stem_text": [w[3] for w in WORDFORMS],
+            "occurences": [w[4] for w in WORDFORMS],
+        },
+    }
+
+
+@pytest.fixture
+def snapshot(tmp_path) -> Snapshot:
+    path = tmp_path / "shakespeare.snapshot"
+    size = write_snapshot(path, make_columns())
+    assert path.stat().st_size == size
+    return Snapshot(path)
+
+
+def naive_projection(name: str) -> list[tuple]:
+    characters = {c[0]: c for c in CHARACTERS}
+    return sorted(
+        (p[1], p[2], p[3], p[6]) for p in PARAGRAPHS if characters[p[3]][1] == name
+    )
+
+
+def test_round_trip(snapshot):
+    columns = make_columns()
+    for name, table in snapshot.tables.items():
+        assert table.rows == len(columns[name]["id"])
+    work = snapshot.tables["work"]
+    assert [work.row(row)["notes"] for row in range(work.rows)] == [None, "Folio"]
+    assert list(snapshot.wordform_rows()) == [w[1:] for w in WORDFORMS]
+
+
+def test_character_paragraphs(snapshot):
+    items = snapshot.character_paragraphs("Hamlet")
+    assert [(item["work_id"], item["paragraph_num"]) for item in items] == [("hamlet", 10), ("hamlet", 40)]
+    assert items[0]["plain_text"] == "Who’s there?"
+    assert items[0]["work"]["title"] == "Hamlet"
+    assert items[0]["chapter"]["description"] == "Elsinore. A platform"
+    assert items[1]["chapter"]["description"] == "A room of state"
+    assert items[0]["character"] == {
+        "id": "hamlet",
+        "name": "Hamlet",
+        "abbrev": None,
+        "description": "Prince",
+        "speech_count": 2,
+    }
+    assert snapshot.character_paragraphs("Nobody") == []
+
+
+@pytest.mark.parametrize("name", ["Ghost", "Hamlet", "Nobody"])
+@pytest.mark.parametrize("limit", [1, 2, 10])
+def test_projection_pages_match_naive(snapshot, name, limit):
+    expected = naive_projection(name)
+    rows, after = [], None
+    while True:
+        page = snapshot.paragraph_projection(name, limit, after)
+        assert len(page) <= limit
+        rows += page
+        if len(page) < limit:
+            break
+        # the cursor of the next page, as the route encodes it
+        after = (page[-1].work_id, page[-1].paragraph_num)
+    assert [(r.work_id, r.paragraph_num, r.character_id, r.plain_text) for r in rows] == expected
+    for row in rows:
+        assert row.character_name == name
+        assert row.work_title == dict(WORKS)[row.work_id]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other"
+    path.write_bytes(b"not a snapshot at all")
+    with pytest.raises(ValueError):
+        Snapshot(path)
@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from app.services.wordforms import BKTree, WordformLookup, edit_distance, edit_pattern
+
+WORDS = ("love", "loved", "lover", "glove", "live", "dove", "move", "loveth", "o'er", "ne'er", "king", "kingdom", "sing")
+
+
+def levenshtein(a: str, b: str) -> int:
+    row = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        prev, row[0] = row[0], i
+        for j, char_b in enumerate(b, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (char_a != char_b))
+    return row[-1]
+
+
+def random_words(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choice("abce'") for _ in range(rng.randint(0, 9))) for _ in range(count)]
+
+
+def test_edit_distance_matches_dynamic_programming():
+    words = random_words(200, seed=1)
+    for a, b in zip(words, reversed(words)):
+        assert edit_distance(edit_pattern(a), b) == levenshtein(a, b)
+
+
+@pytest.mark.parametrize("max_distance", (0, 1, 2, 3))
+def test_bk_tree_search_matches_linear_scan(max_distance: int):
+    words = random_words(300, seed=2)
+    tree = BKTree(words)
+    for query in random_words(30, seed=3):
+        expected = {(word, levenshtein(query, word)) for word in words if levenshtein(query, word) <= max_distance}
+        assert set(tree.search(query, max_distance)) == expected
+
+
+@pytest.mark.parametrize("max_distance", (0, 1, 2))
+def test_fuzzy_matches_linear_scan(max_distance: int):
+    lookup = WordformLookup((word, word[:2], word[:3], len(word)) for word in WORDS)
+    for query in ("love", "lve", "lovee", "kingdum", "oer", "xyz", ""):
+        expected = {(word, levenshtein(query, word)) for word in WORDS if levenshtein(query, word) <= max_distance}
+        found = lookup.fuzzy(query, max_distance, len(WORDS))
+        assert {(word, distance) for word, _, distance in found} == expected
+        # closest first, then the most frequent
+        assert found == sorted(found, key=lambda match: (match[2], -match[1], match[0]))